@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+Benchmarks of python-binexport on synthetic programs of several sizes: load time, traversal
+and rendering of all the functions, and memory usage (peak of the Python allocations traced
+by `tracemalloc`, and maximum resident set size of a fresh process running the case, which
+also accounts for the protobuf memory). The report can be saved as JSON and compared with a
+previous one.
+
+    python benchmarks/run.py --sizes 100,1000,10000 --json after.json --compare before.json
+"""
+
+from __future__ import annotations
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import statistics
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, NamedTuple
+
+from binexport import ProgramBinExport
+from synthetic import write_program
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _traverse(program: ProgramBinExport) -> None:
+    for function in program.values():
+        for bb in function.blocks.values():
+            for instruction in bb.instructions.values():
+                for operand in instruction.operands:
+                    operand.expressions
+
+
+def _render(program: ProgramBinExport) -> None:
+    for function in program.values():
+        for bb in function.blocks.values():
+            for instruction in bb.instructions.values():
+                str(instruction)
+
+
+class Case(NamedTuple):
+    """
+    Benchmark case: the setup is not measured, only the run.
+    """
+
+    name: str
+    description: str
+    setup: Callable[[Path], Any]
+    run: Callable[[Any], Any]
+
+
+CASES = [
+    Case("load", "ProgramBinExport(path)", lambda path: path, ProgramBinExport),
+    Case(
+        "load_lazy",
+        "ProgramBinExport(path, lazy=True)",
+        lambda path: path,
+        lambda path: ProgramBinExport(path, lazy=True),
+    ),
+    Case(
+        "traverse",
+        "functions, blocks, instructions, operands and expressions",
+        ProgramBinExport,
+        _traverse,
+    ),
+    Case("render", "str() of every instruction through the objects", ProgramBinExport, _render),
+    Case(
+        "render_listing",
+        "bulk ProgramBinExport.render_listing()",
+        ProgramBinExport,
+        lambda program: sum(1 for _ in program.render_listing()),
+    ),
+    Case(
+        "iter_instructions",
+        "bulk ProgramBinExport.iter_instructions()",
+        ProgramBinExport,
+        lambda program: sum(1 for _ in program.iter_instructions()),
+    ),
+    Case(
+        "callgraph",
+        "parents and children of every function",
+        ProgramBinExport,
+        lambda program: [(f.parents, f.children) for f in program.values()],
+    ),
+]
+
+
+def measure(case: Case, path: Path, repeat: int) -> dict[str, float]:
+    """
+    Time a case (best and median of several runs) and measure its peak memory
+    in an additional run traced by `tracemalloc`.
+
+    :param case: benchmark case
+    :param path: BinExport file
+    :param repeat: number of timed runs
+    :return: the measures
+    """
+    times = []
+    for _ in range(repeat):
+        state = case.setup(path)
+        gc.collect()
+        start = time.perf_counter()
+        case.run(state)
+        times.append(time.perf_counter() - start)
+        del state
+
+    state = case.setup(path)
+    gc.collect()
+    tracemalloc.start()
+    case.run(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del state
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "peak": peak,
+        "rss": measure_rss(case, path),
+    }
+
+
+def max_rss() -> int:
+    """
+    Maximum resident set size of the current process (in bytes).
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def measure_rss(case: Case, path: Path) -> int | None:
+    """
+    Maximum resident set size of a fresh process running a case.
+
+    :param case: benchmark case
+    :param path: BinExport file
+    :return: the size (in bytes), None if it cannot be measured on this platform
+    """
+    if resource is None:
+        return None
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", case.name, str(path)],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+    )
+    return int(proc.stdout)
+
+
+def run_benchmarks(
+    sizes: list[int], cases: list[Case], repeat: int, program_kwargs: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Run the benchmark cases on a synthetic program of each size.
+
+    :param sizes: numbers of functions of the programs
+    :param cases: benchmark cases
+    :param repeat: number of timed runs per case
+    :param program_kwargs: parameters of the synthetic programs
+    :return: the report
+    """
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "program": program_kwargs,
+        "results": [],
+    }
+    with TemporaryDirectory() as tmpdir:
+        for size in sizes:
+            path = write_program(
+                Path(tmpdir) / f"{size}.BinExport", functions=size, **program_kwargs
+            )
+            file_size = path.stat().st_size
+            for case in cases:
+                result = {"size": size, "file_size": file_size, "case": case.name}
+                result.update(measure(case, path, repeat))
+                report["results"].append(result)
+                print_result(result, sys.stderr)
+    return report
+
+
+def print_result(result: dict[str, Any], file=sys.stdout, baseline: dict | None = None) -> None:
+    """
+    Print a line of the report, with the speedup and memory ratio against a baseline.
+    """
+    rss = f"{result['rss'] / (1 << 20):>9.1f}" if result["rss"] is not None else f"{'-':>9}"
+    line = (
+        f"{result['size']:>8} {result['case']:<18} {result['best'] * 1000:>11.1f} "
+        f"{result['median'] * 1000:>11.1f} {result['peak'] / (1 << 20):>10.1f} {rss}"
+    )
+    if baseline is not None:
+        line += (
+            f" {baseline['best'] / result['best']:>8.2f}x"
+            f" {result['peak'] / max(baseline['peak'], 1):>8.2f}x"
+        )
+    print(line, file=file)
+
+
+def print_report(report: dict[str, Any], baseline: dict[str, Any] | None = None) -> None:
+    """
+    Print the report as a table, compared with a baseline report if given.
+    """
+    header = (
+        f"{'size':>8} {'case':<18} {'best (ms)':>11} {'median (ms)':>11} {'peak (MiB)':>10}"
+        f" {'rss (MiB)':>9}"
+    )
+    if baseline is not None:
+        header += f" {'speedup':>9} {'peak':>9}"
+        baseline = {(r["size"], r["case"]): r for r in baseline["results"]}
+    print(f"python {report['python']} on {report['platform']}")
+    print(f"synthetic programs: {report['program']} (size: number of functions)")
+    print(header)
+    print("-" * len(header))
+    for result in report["results"]:
+        reference = baseline.get((result["size"], result["case"])) if baseline else None
+        print_result(result, baseline=reference if baseline is not None else None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark python-binexport")
+    parser.add_argument(
+        "--sizes", default="100,1000,5000", help="comma-separated numbers of functions"
+    )
+    parser.add_argument("--cases", default=None, help="comma-separated cases (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("-b", "--blocks", type=int, default=5, help="basic blocks per function")
+    parser.add_argument("-i", "--instructions", type=int, default=6, help="instructions per block")
+    parser.add_argument("-e", "--expressions", type=int, default=256, help="distinct operands")
+    parser.add_argument(
+        "-u",
+        "--unaddressed",
+        type=float,
+        default=0.9,
+        help="fraction of instructions without address",
+    )
+    parser.add_argument("-c", "--calls", type=int, default=2, help="call edges per function")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--json", type=Path, default=None, help="save the report as JSON")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON report to compare with")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--child", nargs=2, metavar=("CASE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # Run a single case and print the maximum resident set size (see measure_rss)
+        name, path = args.child
+        case = next(case for case in CASES if case.name == name)
+        case.run(case.setup(Path(path)))
+        print(max_rss())
+        return
+
+    if args.list:
+        for case in CASES:
+            print(f"{case.name:<18} {case.description}")
+        return
+
+    cases = CASES
+    if args.cases:
+        names = args.cases.split(",")
+        cases = [case for case in CASES if case.name in names]
+    program_kwargs = {
+        "blocks": args.blocks,
+        "instructions": args.instructions,
+        "expressions": args.expressions,
+        "unaddressed": args.unaddressed,
+        "calls": args.calls,
+        "seed": args.seed,
+    }
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    report = run_benchmarks(sizes, cases, args.repeat, program_kwargs)
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2))
+    baseline = json.loads(args.compare.read_text()) if args.compare is not None else None
+    print_report(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
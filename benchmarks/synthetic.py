@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+Generator of synthetic (but valid) BinExport2 files of any size, used by the benchmarks.
+"""
+
+from __future__ import annotations
+import random
+import argparse
+import pathlib
+
+from binexport.binexport2_pb2 import BinExport2
+
+MNEMONICS = ["mov", "add", "sub", "cmp", "xor", "lea", "push", "pop", "jz", "jmp", "call", "ret"]
+REGISTERS = ["rax", "rbx", "rcx", "rdx", "rsi", "rdi", "rbp", "rsp", "r8", "r9", "r10", "r11"]
+BASE_ADDRESS = 0x1000  # Address of the first instruction
+DATA_ADDRESS = 0x900000  # Address of the data referenced
+IMPORT_ADDRESS = 0xA00000  # Address of the imported functions
+
+
+class ExpressionPool:
+    """
+    Expression trees of the operands, with the nodes deduplicated as BinExport does:
+    identical nodes (type, symbol, immediate, parent) are stored once.
+    """
+
+    def __init__(self, pb: BinExport2, rng: random.Random, size: int):
+        """
+        :param pb: program being generated
+        :param rng: random generator
+        :param size: number of distinct operands
+        """
+        self._pb = pb
+        self._nodes: dict[tuple, int] = {}
+        self.operands: list[int] = []  #: indices of the operands in the protobuf
+
+        E = BinExport2.Expression
+        for _ in range(size):
+            kind = rng.randrange(3)
+            prefix = self._node(E.SIZE_PREFIX, symbol=rng.choice(["b4", "b8"]))
+            if kind == 0:  # register
+                tree = [prefix, self._node(E.REGISTER, rng.choice(REGISTERS), parent=prefix)]
+            elif kind == 1:  # immediate
+                tree = [
+                    prefix,
+                    self._node(E.IMMEDIATE_INT, imm=rng.randrange(1 << 16), parent=prefix),
+                ]
+            else:  # [reg + imm]
+                deref = self._node(E.DEREFERENCE, "[", parent=prefix)
+                plus = self._node(E.OPERATOR, "+", parent=deref)
+                reg = self._node(E.REGISTER, rng.choice(REGISTERS), parent=plus)
+                imm = self._node(E.IMMEDIATE_INT, imm=rng.randrange(1 << 12), parent=plus)
+                tree = [prefix, deref, plus, reg, imm]
+            operand = pb.operand.add()
+            operand.expression_index.extend(tree)
+            self.operands.append(len(pb.operand) - 1)
+
+    def _node(
+        self,
+        type: int,
+        symbol: str | None = None,
+        imm: int | None = None,
+        parent: int | None = None,
+    ) -> int:
+        key = (type, symbol, imm, parent)
+        if key not in self._nodes:
+            expr = self._pb.expression.add()
+            expr.type = type
+            if symbol is not None:
+                expr.symbol = symbol
+            if imm is not None:
+                expr.immediate = imm
+            if parent is not None:
+                expr.parent_index = parent
+            self._nodes[key] = len(self._pb.expression) - 1
+        return self._nodes[key]
+
+
+def generate_program(
+    functions: int = 100,
+    blocks: int = 5,
+    instructions: int = 6,
+    expressions: int = 256,
+    unaddressed: float = 0.9,
+    calls: int = 2,
+    seed: int = 0,
+) -> BinExport2:
+    """
+    Generate a synthetic program. Instructions are laid out contiguously, function after
+    function, with the address of each function entry set.
+
+    :param functions: number of functions
+    :param blocks: number of basic blocks per function
+    :param instructions: number of instructions per basic block
+    :param expressions: number of distinct operands, shared by the instructions
+    :param unaddressed: fraction of the instructions without an explicit address
+    :param calls: number of call instructions (and call graph edges) per function
+    :param seed: seed of the random generator
+    :return: the protobuf of the program
+    """
+    rng = random.Random(seed)
+    pb = BinExport2()
+    pb.meta_information.executable_name = f"synthetic_{functions}"
+    pb.meta_information.executable_id = f"{seed:064x}"
+    pb.meta_information.architecture_name = "x86-64"
+    for name in MNEMONICS:
+        pb.mnemonic.add().name = name
+    call_mnemonic = MNEMONICS.index("call")
+    pool = ExpressionPool(pb, rng, expressions)
+
+    # Layout: size of each instruction and address of each function entry
+    per_function = blocks * instructions
+    sizes = [rng.randrange(1, 8) for _ in range(functions * per_function)]
+    entries = []
+    addr = BASE_ADDRESS
+    for f in range(functions):
+        entries.append(addr)
+        addr += sum(sizes[f * per_function : (f + 1) * per_function])
+    imported = IMPORT_ADDRESS
+
+    addr = BASE_ADDRESS
+    call_edges = []
+    for f in range(functions):
+        first = len(pb.instruction)
+        # Call instructions of the function, to other functions or to the import
+        call_sites = {}  # {instruction -> callee (the import is the last vertex)}
+        for site in rng.sample(range(1, per_function), min(calls, per_function - 1)):
+            call_sites[site] = rng.randrange(functions) if rng.random() < 0.8 else functions
+            call_edges.append((f, call_sites[site]))
+
+        for i in range(per_function):
+            inst_idx = len(pb.instruction)
+            inst = pb.instruction.add()
+            if i == 0 or rng.random() >= unaddressed:
+                inst.address = addr
+            inst.raw_bytes = rng.randbytes(sizes[inst_idx])
+            if i in call_sites:
+                inst.mnemonic_index = call_mnemonic
+                callee = call_sites[i]
+                inst.call_target.append(entries[callee] if callee < functions else imported)
+            else:
+                inst.mnemonic_index = rng.randrange(len(MNEMONICS))
+                inst.operand_index.extend(rng.sample(pool.operands, rng.randrange(3)))
+            addr += sizes[inst_idx]
+
+            # A few references, strings and comments
+            if rng.random() < 0.05:
+                ref = pb.data_reference.add()
+                ref.instruction_index = inst_idx
+                ref.address = DATA_ADDRESS + rng.randrange(0x1000)
+            if rng.random() < 0.02:
+                pb.string_table.append(f"string_{len(pb.string_table)}")
+                ref = pb.string_reference.add()
+                ref.instruction_index = inst_idx
+                ref.string_table_index = len(pb.string_table) - 1
+            if rng.random() < 0.02:
+                pb.string_table.append(f"comment_{len(pb.string_table)}")
+                comment = pb.comment.add()
+                comment.instruction_index = inst_idx
+                comment.string_table_index = len(pb.string_table) - 1
+                comment.type = BinExport2.Comment.DEFAULT
+                inst.comment_index.append(len(pb.comment) - 1)
+
+        # Basic blocks and control flow: fallthrough, a conditional jump and a back edge
+        flow_graph = pb.flow_graph.add()
+        bb_indices = []
+        for b in range(blocks):
+            bb = pb.basic_block.add()
+            rng_idx = bb.instruction_index.add()
+            rng_idx.begin_index = first + b * instructions
+            if instructions > 1:
+                rng_idx.end_index = first + (b + 1) * instructions
+            bb_indices.append(len(pb.basic_block) - 1)
+        flow_graph.basic_block_index.extend(bb_indices)
+        flow_graph.entry_basic_block_index = bb_indices[0]
+        for b, bb_idx in enumerate(bb_indices[:-1]):
+            edge = flow_graph.edge.add()
+            edge.source_basic_block_index = bb_idx
+            edge.target_basic_block_index = bb_indices[b + 1]
+            edge.type = BinExport2.FlowGraph.Edge.CONDITION_FALSE
+            if b + 2 < blocks:
+                edge = flow_graph.edge.add()
+                edge.source_basic_block_index = bb_idx
+                edge.target_basic_block_index = bb_indices[rng.randrange(b + 2, blocks)]
+                edge.type = BinExport2.FlowGraph.Edge.CONDITION_TRUE
+        if blocks > 1:
+            edge = flow_graph.edge.add()
+            edge.source_basic_block_index = bb_indices[-1]
+            edge.target_basic_block_index = bb_indices[0]
+            edge.type = BinExport2.FlowGraph.Edge.UNCONDITIONAL
+            edge.is_back_edge = True
+
+    # Call graph
+    call_graph = pb.call_graph
+    for f, entry in enumerate(entries):
+        vertex = call_graph.vertex.add()
+        vertex.address = entry
+        vertex.mangled_name = f"function_{f}"
+    vertex = call_graph.vertex.add()
+    vertex.address = imported
+    vertex.type = BinExport2.CallGraph.Vertex.IMPORTED
+    vertex.mangled_name = "imported_function"
+    for source, target in dict.fromkeys(call_edges):
+        edge = call_graph.edge.add()
+        edge.source_vertex_index = source
+        edge.target_vertex_index = target
+
+    section = pb.section.add()
+    section.address = BASE_ADDRESS
+    section.size = addr - BASE_ADDRESS
+    section.flag_r = True
+    section.flag_x = True
+    return pb
+
+
+def write_program(path: pathlib.Path | str, **kwargs) -> pathlib.Path:
+    """
+    Generate a synthetic program and write it as a BinExport file.
+
+    :param path: BinExport file path
+    :param kwargs: arguments of :py:func:`generate_program`
+    :return: the path
+    """
+    path = pathlib.Path(path)
+    path.write_bytes(generate_program(**kwargs).SerializeToString())
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic BinExport file")
+    parser.add_argument("output", type=pathlib.Path, help="BinExport file to write")
+    parser.add_argument("-f", "--functions", type=int, default=100, help="number of functions")
+    parser.add_argument("-b", "--blocks", type=int, default=5, help="basic blocks per function")
+    parser.add_argument("-i", "--instructions", type=int, default=6, help="instructions per block")
+    parser.add_argument("-e", "--expressions", type=int, default=256, help="distinct operands")
+    parser.add_argument(
+        "-u",
+        "--unaddressed",
+        type=float,
+        default=0.9,
+        help="fraction of instructions without address",
+    )
+    parser.add_argument("-c", "--calls", type=int, default=2, help="call edges per function")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+    write_program(
+        args.output,
+        functions=args.functions,
+        blocks=args.blocks,
+        instructions=args.instructions,
+        expressions=args.expressions,
+        unaddressed=args.unaddressed,
+        calls=args.calls,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
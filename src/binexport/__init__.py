@@ -5,3 +5,5 @@ from .instruction import InstructionBinExport
 from .operand import OperandBinExport
 from .expression import ExpressionBinExport
 from .types import DisassemblerBackend
+from .parallel import ProgramResult, map_programs, load_many
+from .shared import SharedProgram
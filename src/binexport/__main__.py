@@ -1,19 +1,24 @@
 #!/usr/bin/env python3
 # coding: utf-8
 
+from __future__ import annotations
+import os
+import shutil
 import logging
-import traceback
+import threading
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Generator
 
 import magic
 import click
 import queue
 
-from multiprocessing import Pool, Queue, Manager
-from binexport import ProgramBinExport
 from binexport.utils import logger
 from binexport.types import DisassemblerBackend
+from binexport.manifest import ExportManifest, ExportStatus, sha256_file
+from binexport.scheduler import ExportScheduler, ExportResult, physical_memory
+from binexport.ida_pool import IDAWorkerPool, SESSION_EXPORTS
 
 BINARY_FORMAT = {
     "application/x-dosexec",
@@ -25,6 +30,28 @@ BINARY_FORMAT = {
 
 EXTENSIONS_WHITELIST = {"application/octet-stream": [".dex"]}
 
+# Magic bytes of the binary formats, checked before falling back to libmagic
+ELF_MAGIC = b"\x7fELF"
+ELF_TYPES = {2, 3}  # ET_EXEC, ET_DYN (relocatable objects and core dumps are not exported)
+MZ_MAGIC = b"MZ"  # DOS header, followed by the PE header at the offset e_lfanew
+PE_MAGIC = b"PE\0\0"
+E_LFANEW_OFFSET = 0x3C
+MAGIC_HEADERS = (
+    b"\xfe\xed\xfa\xce",  # Mach-O 32 bits
+    b"\xfe\xed\xfa\xcf",  # Mach-O 64 bits
+    b"\xce\xfa\xed\xfe",  # Mach-O 32 bits (little endian)
+    b"\xcf\xfa\xed\xfe",  # Mach-O 64 bits (little endian)
+    b"dex\n",  # DEX
+)
+# Headers shared with other formats, resolved by libmagic (fat Mach-O vs. Java class, and
+# DOS executables vs. any file starting with "MZ" when there is no PE header)
+AMBIGUOUS_HEADERS = (b"\xca\xfe\xba\xbe", MZ_MAGIC)
+ELF_HEADER_SIZE = 20  # Enough to read the ELF type
+HEADER_SIZE = 64  # Enough to read the DOS header
+
+# Number of threads walking the directories
+DISCOVERY_WORKERS = 8
+
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"], max_content_width=300)
 # Default backend to use
 BACKEND = DisassemblerBackend.IDA
@@ -42,36 +69,132 @@ class Bcolors:
     UNDERLINE = "\033[4m"
 
 
-def recursive_file_iter(p: Path) -> Generator[Path, None, None]:
+def is_binary_file(p: Path) -> bool:
+    """
+    Whether a file is a binary to export. The format is first identified with the
+    magic bytes of its header (and the PE signature for MZ files), libmagic is only used
+    for the ambiguous headers and the whitelisted extensions.
+
+    :param p: file path
+    :return: True if the file is a binary
+    """
+    try:
+        with open(p, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            pe_header = b""
+            if header.startswith(MZ_MAGIC) and len(header) == HEADER_SIZE:
+                f.seek(int.from_bytes(header[E_LFANEW_OFFSET : E_LFANEW_OFFSET + 4], "little"))
+                pe_header = f.read(len(PE_MAGIC))
+    except OSError:
+        return False
+
+    if header.startswith(ELF_MAGIC):
+        if len(header) < ELF_HEADER_SIZE:
+            return False
+        return int.from_bytes(header[16:18], "big" if header[5] == 2 else "little") in ELF_TYPES
+    if header.startswith(MAGIC_HEADERS) or pe_header == PE_MAGIC:
+        return True
+    if not header.startswith(AMBIGUOUS_HEADERS) and not any(
+        p.suffix in suffixes for suffixes in EXTENSIONS_WHITELIST.values()
+    ):
+        return False
+
+    mime_type = magic.from_file(str(p), mime=True)
+    return mime_type in BINARY_FORMAT or p.suffix in EXTENSIONS_WHITELIST.get(mime_type, [])
+
+
+def recursive_file_iter(p: Path, workers: int = DISCOVERY_WORKERS) -> Generator[Path, None, None]:
+    """
+    Iterates over the binaries of a directory (recursively). The directories are walked
+    concurrently by a pool of threads and the binaries are yielded as soon as they are found
+    (in no particular order). Symbolic links are not followed.
+
+    :param p: binary file or directory
+    :param workers: number of threads walking the directories
+    :return: generator of the binary paths
+    """
     if p.is_file():
-        mime_type = magic.from_file(str(p), mime=True)
-        if mime_type not in BINARY_FORMAT and p.suffix not in EXTENSIONS_WHITELIST.get(
-            mime_type, []
-        ):
-            pass
-        else:
+        if is_binary_file(p):
             yield p
-    elif p.is_dir():
-        for f in p.iterdir():
-            yield from recursive_file_iter(f)
+        return
+    if not p.is_dir():
+        return
+
+    found = queue.Queue()
+    lock = threading.Lock()
+    pending = 0  # Number of directories to scan
+    done = object()  # Sentinel put once all directories are scanned
 
+    def submit(directory: str) -> None:
+        nonlocal pending
+        with lock:
+            pending += 1
+        executor.submit(scan, directory)
 
-def export_job(ingress, egress) -> bool:
-    while True:
+    def scan(directory: str) -> None:
+        nonlocal pending
         try:
-            file = ingress.get(timeout=0.5)
-            res = ProgramBinExport.from_binary_file(
-                file.as_posix(), backend=BACKEND, open_export=False
-            )
-            egress.put((file, res))
-        except Exception as e:
-            # Print out unhandled exception
-            logger.error(traceback.format_exception(e).decode())
-            egress.put((file, False))
-        except queue.Empty:
-            pass
-        except KeyboardInterrupt:
-            break
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            submit(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and is_binary_file(
+                            Path(entry.path)
+                        ):
+                            found.put(Path(entry.path))
+                    except OSError:
+                        pass
+        except OSError as e:
+            logger.warning(f"Cannot list {directory}: {e}")
+        finally:
+            with lock:
+                pending -= 1
+                if pending == 0:
+                    found.put(done)
+
+    executor = ThreadPoolExecutor(workers)
+    try:
+        submit(str(p))
+        while (item := found.get()) is not done:
+            yield item
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def output_path(file: Path, root: Path, output_dir: Path | None) -> Path:
+    """
+    Path of the BinExport file of a binary: next to it, or at the same relative
+    path in the output directory.
+
+    :param file: binary path
+    :param root: input file or directory
+    :param output_dir: output directory (None to export next to the binaries)
+    :return: BinExport file path
+    """
+    if output_dir is None:
+        return Path(str(file) + ".BinExport")
+    relative = file.relative_to(root) if root.is_dir() else Path(file.name)
+    return output_dir / (str(relative) + ".BinExport")
+
+
+def link_export(source: Path, destination: Path) -> None:
+    """
+    Make the BinExport file of a duplicated binary point to the export of the original,
+    as a hard link or a copy when the filesystem does not allow it.
+
+    :param source: existing BinExport file
+    :param destination: BinExport file of the duplicated binary
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if destination.exists():
+        if destination.samefile(source):
+            return
+        destination.unlink()
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
 
 
 @click.command(context_settings=CONTEXT_SETTINGS)
@@ -90,17 +213,77 @@ def export_job(ingress, egress) -> bool:
     help="Ghidra installation directory",
 )
 @click.option("-t", "--threads", type=int, default=1, help="Thread number to use")
+@click.option(
+    "--timeout",
+    type=float,
+    default=None,
+    help="Timeout of the export of a binary in seconds (default: none)",
+)
+@click.option(
+    "-m",
+    "--memory-budget",
+    type=int,
+    default=None,
+    help="Memory available for the exports in MiB (default: physical memory)",
+)
+@click.option(
+    "-o",
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory where to write the BinExport files (default: next to the binaries)",
+)
+@click.option(
+    "-s",
+    "--ida-sessions",
+    is_flag=True,
+    help="Export with long-lived IDA sessions (requires idalib, IDA Pro 9)",
+)
+@click.option(
+    "--session-exports",
+    type=int,
+    default=SESSION_EXPORTS,
+    help="Number of binaries exported by an IDA session before it is restarted",
+)
+@click.option("-f", "--force", is_flag=True, help="Export again all the binaries")
+@click.option(
+    "--retry-failed", is_flag=True, help="Export again the binaries that failed or timed out"
+)
 @click.option("-v", "--verbose", count=True, help="To activate or not the verbosity")
 @click.argument("input_file", type=click.Path(exists=True), metavar="<binary file|directory>")
-def main(ida_path: str, ghidra_path: str, input_file: str, threads: int, verbose: bool) -> None:
+def main(
+    ida_path: str,
+    ghidra_path: str,
+    input_file: str,
+    threads: int,
+    timeout: float | None,
+    memory_budget: int | None,
+    output_dir: str | None,
+    ida_sessions: bool,
+    session_exports: int,
+    force: bool,
+    retry_failed: bool,
+    verbose: bool,
+) -> None:
     """
     binexporter is a very simple utility to generate a .BinExport file
     for a given binary or a directory. It all open the binary file and export the file
-    seamlessly.
+    seamlessly. Exports are recorded in a manifest (keyed by the SHA-256 of the binaries)
+    stored in the output directory, so that unchanged binaries are skipped, duplicated
+    binaries are linked to a single export and an interrupted run can be resumed.
+    The largest binaries are exported first, an export starts only if the memory it is
+    estimated to need fits the memory budget, and exports exceeding the timeout are killed.
 
     :param ida_path: Path to the IDA Pro installation directory
     :param input_file: Path of the binary to export
     :param threads: number of threads to use
+    :param timeout: timeout of the export of a binary (in seconds)
+    :param memory_budget: memory available for the exports (in MiB)
+    :param output_dir: directory where to write the BinExport files
+    :param ida_sessions: export with long-lived IDA sessions
+    :param session_exports: number of binaries exported by an IDA session before it is restarted
+    :param force: export again all the binaries
+    :param retry_failed: export again the binaries whose export failed
     :param verbose: To activate or not the verbosity
     :return: None
     """
@@ -117,38 +300,116 @@ def main(ida_path: str, ghidra_path: str, input_file: str, threads: int, verbose
         BACKEND = DisassemblerBackend.GHIDRA
 
     root_path = Path(input_file)
+    if output_dir is not None:
+        out_path = Path(output_dir)
+        out_path.mkdir(parents=True, exist_ok=True)
+    else:
+        out_path = None
+    manifest = ExportManifest(out_path or (root_path if root_path.is_dir() else root_path.parent))
+
+    if memory_budget is not None:
+        memory_budget <<= 20
+    else:
+        memory_budget = physical_memory()
 
-    manager = Manager()
-    ingress = manager.Queue()
-    egress = manager.Queue()
-    pool = Pool(threads)
-
-    # Launch all workers
-    for _ in range(threads):
-        pool.apply_async(export_job, (ingress, egress))
-
-    # Pre-fill ingress queue
-    total = 0
-    for file in recursive_file_iter(root_path):
-        ingress.put(file)
-        total += 1
-
-    logger.info(f"Start exporting {total} binaries")
-
-    i = 0
-    while True:
-        item = egress.get()
-        i += 1
-        path, res = item
-        if res:
+    # Schedule the binaries to export as they are discovered
+    total = skipped = errors = exported = 0
+    jobs = {}  # {binary -> sha256}
+    duplicates = {}  # {sha256 -> [(binary, output)]} waiting for an export of this run
+
+    def handle_result(result: ExportResult) -> None:
+        nonlocal exported
+        path, output = result.job.path, result.job.output
+        exported += 1
+        sha256 = jobs.pop(path)
+        manifest.finish(
+            sha256, BACKEND, path, output, result.success, result.duration, result.timed_out
+        )
+        if result.success:
             pp_res = Bcolors.OKGREEN + "OK" + Bcolors.ENDC
+            for file, dup_output in duplicates.pop(sha256):
+                link_export(output, dup_output)
+                logger.debug(f"{file} is a duplicate of {path}, linked")
+                manifest.add_file(file, sha256, BACKEND, dup_output)
         else:
-            pp_res = Bcolors.FAIL + "KO" + Bcolors.ENDC
-        logger.info(f"[{i}/{total}] {str(path) + '.BinExport'} [{pp_res}]")
-        if i == total:
-            break
+            pp_res = Bcolors.FAIL + ("TIMEOUT" if result.timed_out else "KO") + Bcolors.ENDC
+            for file, _ in duplicates.pop(sha256):
+                logger.debug(f"{file} is a duplicate of {path}, skipped")
+        logger.info(f"[{exported}/{total}] {output} [{pp_res}] ({result.duration:.1f}s)")
+
+    if ida_sessions and BACKEND == DisassemblerBackend.IDA:
+        ida_pool = IDAWorkerPool(threads, session_exports)
+    else:
+        ida_pool = None
+
+    try:
+        with ExportScheduler(BACKEND, threads, timeout, memory_budget, ida_pool) as scheduler:
+            for file in recursive_file_iter(root_path):
+                # Handle the results of the exports already done
+                for result in scheduler.results(block=False):
+                    handle_result(result)
+
+                try:
+                    sha256 = sha256_file(file)
+                except OSError as e:  # e.g. removed or unreadable since its discovery
+                    logger.warning(f"{file} cannot be read, skipped: {e}")
+                    errors += 1
+                    continue
+                output = output_path(file, root_path, out_path)
+                if sha256 in duplicates:  # Same content being exported by this run
+                    duplicates[sha256].append((file, output))
+                    continue
+
+                entry = manifest.lookup(sha256, BACKEND)
+
+                if not force and entry is not None:
+                    if entry.status == ExportStatus.SUCCESS and Path(entry.output).exists():
+                        if Path(entry.output) != output:
+                            link_export(Path(entry.output), output)
+                            logger.debug(f"{file} is a duplicate of {entry.path}, linked")
+                        manifest.add_file(file, sha256, BACKEND, output)
+                        skipped += 1
+                        continue
+                    if (
+                        entry.status in (ExportStatus.FAILURE, ExportStatus.TIMEOUT)
+                        and not retry_failed
+                    ):
+                        logger.debug(f"{file} failed to export previously, skipped")
+                        skipped += 1
+                        continue
+                elif not force and output.exists() and manifest.file_hash(file, BACKEND) is None:
+                    # Exported before the manifest existed, adopt it
+                    manifest.finish(sha256, BACKEND, file, output, True, None)
+                    skipped += 1
+                    continue
+
+                manifest.start(sha256, BACKEND, file, output)
+                try:
+                    output.parent.mkdir(parents=True, exist_ok=True)
+                    scheduler.submit(file, output)
+                except OSError as e:
+                    logger.warning(f"{file} cannot be exported: {e}")
+                    manifest.finish(sha256, BACKEND, file, output, False, None)
+                    errors += 1
+                    continue
+                jobs[file] = sha256
+                duplicates[sha256] = []
+                total += 1
+
+            logger.info(
+                f"Discovery done: {total} binaries to export ({skipped} up to date, "
+                f"{errors} errors)"
+            )
 
-    pool.terminate()
+            # The scheduler stops once all the exports are done
+            scheduler.close()
+            for result in scheduler.results():
+                handle_result(result)
+    finally:
+        # Exiting the scheduler on an error (or interruption) kills the running exports
+        if ida_pool is not None:
+            ida_pool.close()
+        manifest.close()
 
 
 if __name__ == "__main__":
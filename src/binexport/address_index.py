@@ -0,0 +1,250 @@
+from __future__ import annotations
+import array
+import bisect
+from typing import TYPE_CHECKING, NamedTuple
+
+from binexport.utils import instruction_index_range
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if TYPE_CHECKING:
+    from collections import abc
+    from binexport.program import ProgramBinExport
+    from binexport.types import Addr
+
+
+class AddressInfo(NamedTuple):
+    """
+    Items containing an address, see :py:meth:`AddressIndex.lookup`.
+    """
+
+    instruction: int | None  #: index of the instruction, None if not in an instruction
+    basic_blocks: tuple[int, ...]  #: indices of the basic blocks containing the instruction
+    functions: tuple[Addr, ...]  #: addresses of the functions containing the basic blocks
+    section: int | None  #: index of the section, None if not in a section
+
+
+class AddressLookup(NamedTuple):
+    """
+    Result of :py:meth:`AddressIndex.bulk_lookup`, one value per address in each column
+    (-1 when the address is not found).
+    When an instruction belongs to several basic blocks or a basic block to several functions,
+    the first owner is given and the address is flagged as `shared`
+    (use :py:meth:`AddressIndex.lookup` to get all of them).
+    """
+
+    instruction: array.array  #: index of the instruction
+    basic_block: array.array  #: index of the (first) basic block
+    function: array.array  #: row of the (first) function in :py:attr:`AddressIndex.functions`
+    section: array.array  #: index of the section
+    shared: array.array  #: 1 if the instruction has several basic blocks or functions
+
+
+class AddressIndex:
+    """
+    Sorted interval index over the instructions and the sections of a program, resolving
+    any address (not only function entry points and basic block heads) to the instruction,
+    basic blocks, functions and section containing it. Instructions are mapped to their basic
+    blocks and basic blocks to their functions, a basic block shared by several functions is
+    thus resolved to all of them.
+    """
+
+    def __init__(self, program: ProgramBinExport):
+        """
+        :param program: program to index
+        """
+        pb = program.proto
+        addresses = program.instruction_addresses
+        offsets = program._code[1]
+
+        # Instructions sorted by address (usually already the protobuf order)
+        count = len(addresses)
+        if all(addresses[i] <= addresses[i + 1] for i in range(count - 1)):
+            order = array.array("I", range(count))
+        else:
+            order = array.array("I", sorted(range(count), key=addresses.__getitem__))
+        self._inst_order = order
+        self._inst_starts = array.array("Q", (addresses[i] for i in order))
+        self._inst_ends = array.array(
+            "Q", (addresses[i] + offsets[i + 1] - offsets[i] for i in order)
+        )
+
+        #: Address of the functions (with instructions), rows of :py:attr:`AddressLookup.function`
+        self.functions = array.array("Q")
+        block_functions: dict[int, list[int]] = {}  # {bb index -> function rows}
+        flow_graphs = pb.flow_graph
+        for addr, fg_idx in program._function_index.items():
+            if fg_idx is not None:
+                row = len(self.functions)
+                self.functions.append(addr)
+                for bb_idx in flow_graphs[fg_idx].basic_block_index:
+                    block_functions.setdefault(bb_idx, []).append(row)
+
+        # First owner of each instruction / basic block, the other ones are kept aside
+        self._inst_block = array.array("q", [-1]) * count
+        self._inst_blocks_extra: dict[int, list[int]] = {}
+        for bb_idx, bb in enumerate(pb.basic_block):
+            for rng in bb.instruction_index:
+                for idx in instruction_index_range(rng):
+                    if self._inst_block[idx] < 0:
+                        self._inst_block[idx] = bb_idx
+                    else:
+                        self._inst_blocks_extra.setdefault(idx, []).append(bb_idx)
+        self._block_function = array.array("q", [-1]) * len(pb.basic_block)
+        self._block_functions_extra: dict[int, list[int]] = {}
+        for bb_idx, rows in block_functions.items():
+            self._block_function[bb_idx] = rows[0]
+            if len(rows) > 1:
+                self._block_functions_extra[bb_idx] = rows[1:]
+
+        # Sections sorted by address
+        sections = sorted(range(len(pb.section)), key=lambda i: pb.section[i].address)
+        self._sect_order = array.array("I", sections)
+        self._sect_starts = array.array("Q", (pb.section[i].address for i in sections))
+        self._sect_ends = array.array(
+            "Q", (pb.section[i].address + pb.section[i].size for i in sections)
+        )
+
+    @staticmethod
+    def _find(starts: array.array, ends: array.array, addr: Addr) -> int:
+        """
+        Position of the interval containing the address (-1 if none).
+        """
+        pos = bisect.bisect_right(starts, addr) - 1
+        if pos >= 0 and addr < ends[pos]:
+            return pos
+        return -1
+
+    def instruction(self, addr: Addr) -> int | None:
+        """
+        Index of the instruction containing the address.
+
+        :param addr: address
+        :return: instruction index, None if the address is not in an instruction
+        """
+        pos = self._find(self._inst_starts, self._inst_ends, addr)
+        return self._inst_order[pos] if pos >= 0 else None
+
+    def basic_blocks(self, addr: Addr) -> tuple[int, ...]:
+        """
+        Indices of the basic blocks containing the address.
+
+        :param addr: address
+        :return: basic block indices (empty if none)
+        """
+        idx = self.instruction(addr)
+        if idx is None or self._inst_block[idx] < 0:
+            return ()
+        return (self._inst_block[idx], *self._inst_blocks_extra.get(idx, ()))
+
+    def functions_at(self, addr: Addr) -> tuple[Addr, ...]:
+        """
+        Addresses of the functions containing the address.
+
+        :param addr: address
+        :return: function addresses (empty if none)
+        """
+        rows = []
+        for bb_idx in self.basic_blocks(addr):
+            if self._block_function[bb_idx] >= 0:
+                rows.append(self._block_function[bb_idx])
+                rows.extend(self._block_functions_extra.get(bb_idx, ()))
+        return tuple(self.functions[row] for row in dict.fromkeys(rows))
+
+    def section(self, addr: Addr) -> int | None:
+        """
+        Index of the section containing the address.
+
+        :param addr: address
+        :return: section index, None if the address is not in a section
+        """
+        pos = self._find(self._sect_starts, self._sect_ends, addr)
+        return self._sect_order[pos] if pos >= 0 else None
+
+    def lookup(self, addr: Addr) -> AddressInfo:
+        """
+        Resolve an address to the instruction, basic blocks, functions and section
+        containing it.
+
+        :param addr: address
+        :return: the items containing the address
+        """
+        return AddressInfo(
+            self.instruction(addr),
+            self.basic_blocks(addr),
+            self.functions_at(addr),
+            self.section(addr),
+        )
+
+    def bulk_lookup(self, addresses: abc.Iterable[Addr]) -> AddressLookup:
+        """
+        Resolve many addresses at once (e.g. coverage or profiler samples). It is
+        vectorized with NumPy when installed.
+
+        :param addresses: addresses to resolve
+        :return: columns of the resolution, with one value per address
+        """
+        if numpy is not None:
+            return self._bulk_lookup_numpy(addresses)
+
+        instructions = array.array("q")
+        sections = array.array("q")
+        for addr in addresses:
+            pos = self._find(self._inst_starts, self._inst_ends, addr)
+            instructions.append(self._inst_order[pos] if pos >= 0 else -1)
+            pos = self._find(self._sect_starts, self._sect_ends, addr)
+            sections.append(self._sect_order[pos] if pos >= 0 else -1)
+
+        blocks = array.array("q", (self._inst_block[i] if i >= 0 else -1 for i in instructions))
+        functions = array.array("q", (self._block_function[b] if b >= 0 else -1 for b in blocks))
+        shared = array.array(
+            "B",
+            (
+                i in self._inst_blocks_extra or b in self._block_functions_extra
+                for i, b in zip(instructions, blocks)
+            ),
+        )
+        return AddressLookup(instructions, blocks, functions, sections, shared)
+
+    def _bulk_lookup_numpy(self, addresses: abc.Iterable[Addr]) -> AddressLookup:
+        """
+        NumPy implementation of :py:meth:`AddressIndex.bulk_lookup`.
+        """
+        queries = numpy.fromiter(addresses, dtype=numpy.uint64)
+
+        def find(starts, ends, order):
+            starts = numpy.frombuffer(starts, dtype=numpy.uint64)
+            ends = numpy.frombuffer(ends, dtype=numpy.uint64)
+            pos = numpy.searchsorted(starts, queries, side="right").astype(numpy.int64) - 1
+            found = pos >= 0
+            found[found] = queries[found] < ends[pos[found]]
+            result = numpy.full(len(queries), -1, dtype=numpy.int64)
+            result[found] = numpy.frombuffer(order, dtype=numpy.uint32)[pos[found]]
+            return result
+
+        instructions = find(self._inst_starts, self._inst_ends, self._inst_order)
+        sections = find(self._sect_starts, self._sect_ends, self._sect_order)
+
+        found = instructions >= 0
+        blocks = numpy.full(len(queries), -1, dtype=numpy.int64)
+        blocks[found] = numpy.frombuffer(self._inst_block, dtype=numpy.int64)[instructions[found]]
+        found = blocks >= 0
+        functions = numpy.full(len(queries), -1, dtype=numpy.int64)
+        functions[found] = numpy.frombuffer(self._block_function, dtype=numpy.int64)[blocks[found]]
+        shared = numpy.isin(instructions, list(self._inst_blocks_extra)) | numpy.isin(
+            blocks, list(self._block_functions_extra)
+        )
+
+        def column(values, typecode):
+            return array.array(typecode, values.tobytes())
+
+        return AddressLookup(
+            column(instructions, "q"),
+            column(blocks, "q"),
+            column(functions, "q"),
+            column(sections, "q"),
+            column(shared.astype(numpy.uint8), "B"),
+        )
@@ -0,0 +1,269 @@
+from __future__ import annotations
+import os
+import signal
+import asyncio
+import pathlib
+import functools
+from tempfile import TemporaryDirectory
+from typing import TYPE_CHECKING, Any
+
+from binexport.program import ProgramBinExport
+from binexport.types import DisassemblerBackend
+from binexport.utils import logger
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+def _ida_command(exec_file: pathlib.Path, binexport_file: pathlib.Path) -> list[str] | None:
+    """
+    Command line of IDA exporting a program in batch mode (as run by ``idascript``).
+
+    :param exec_file: executable file path
+    :param binexport_file: BinExport output file
+    :return: the command line, None if IDA is not found
+    """
+    from idascript import get_ida_path
+
+    ida_path = get_ida_path()
+    if ida_path is None:
+        logger.error("IDA Pro executable not found, please set the 'IDA_PATH' environment variable")
+        return None
+    return [
+        ida_path.as_posix(),
+        "-A",
+        "-OBinExportAutoAction:BinExportBinary",
+        f"-OBinExportModule:{binexport_file}",
+        exec_file.resolve().as_posix(),
+    ]
+
+
+async def _run(command: list[str], timeout: float | None, env: dict[str, str] | None = None):
+    """
+    Run a backend in a subprocess, killed along with the processes it launched on
+    timeout or cancellation.
+
+    :param command: command line
+    :param timeout: timeout (in seconds), None for no timeout
+    :param env: environment of the process
+    :raise asyncio.TimeoutError: if the process lasts longer than the timeout
+    :return: the return code and the standard output
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        env=env,
+        start_new_session=True,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except BaseException:  # Timeout or cancellation
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        raise
+    return process.returncode, stdout
+
+
+async def export_binary(
+    exec_file: pathlib.Path | str,
+    output_file: pathlib.Path | str = "",
+    override: bool = False,
+    backend: DisassemblerBackend = DisassemblerBackend.IDA,
+    timeout: float | None = None,
+) -> bool:
+    """
+    Asynchronous counterpart of :py:meth:`ProgramBinExport.from_binary_file` (without
+    opening the export), running the backend in an asyncio subprocess. Cancelling the
+    task kills the backend.
+
+    :param exec_file: executable file path
+    :param output_file: BinExport output file (default: next to the executable)
+    :param override: Override the .BinExport if already existing. (default false)
+    :param backend: The backend to use. (Either 'IDA' or 'Ghidra')
+    :param timeout: timeout of the export (in seconds), None for no timeout
+    :return: whether the export succeeded
+    """
+    exec_file = pathlib.Path(exec_file)
+    binexport_file = (
+        pathlib.Path(output_file) if output_file else pathlib.Path(str(exec_file) + ".BinExport")
+    )
+
+    # If the binexport file already exists, do not want to override
+    if binexport_file.exists() and not override:
+        return True
+
+    try:
+        if backend == DisassemblerBackend.IDA:
+            command = _ida_command(exec_file, binexport_file)
+            if command is None:
+                return False
+            env = dict(os.environ, TVHEADLESS="1", TERM="xterm")
+            retcode, _ = await _run(command, timeout, env)
+            if retcode != 0 and not binexport_file.exists():
+                logger.warning(
+                    f"{exec_file.name} failed to export [ret:{retcode}, binexport:False]"
+                )
+                return False
+
+        elif backend == DisassemblerBackend.GHIDRA:
+            ghidra_dir = ProgramBinExport._ghidra_dir()
+            if ghidra_dir is None:
+                return False
+            with TemporaryDirectory() as tmpdirname:
+                command = ProgramBinExport._ghidra_command(
+                    ghidra_dir, pathlib.Path(tmpdirname), [(exec_file, binexport_file)]
+                )
+                retcode, stdout = await _run(command, timeout)
+            if retcode != 0:
+                logger.warning(
+                    f"{exec_file.name} failed to export [ret:{retcode}, binexport:{binexport_file.exists()}]"
+                )
+                return False
+            elif b"BinExport plugin is not installed" in stdout:
+                logger.warning("BinExport plugin not found, please install it!")
+                return False
+
+        else:
+            logger.error(f"Invalid backend '{backend}'")
+            return False
+
+    except asyncio.TimeoutError:
+        logger.warning(f"{exec_file.name} failed to export [timeout:{timeout}s]")
+        return False
+
+    if not binexport_file.exists():
+        logger.error(f"{exec_file} can't find binexport generated")
+        return False
+    return True
+
+
+async def load_program(
+    file: pathlib.Path | str, executor: Executor | None = None, **program_kwargs: Any
+) -> ProgramBinExport:
+    """
+    Load a BinExport file without blocking the event loop, the file is parsed in an
+    executor (the default executor of the loop if None).
+
+    :param file: BinExport file path
+    :param executor: executor parsing the file
+    :param program_kwargs: arguments of :py:class:`ProgramBinExport` (e.g. lazy, fields)
+    :return: the program
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(ProgramBinExport, file, **program_kwargs)
+    )
+
+
+async def from_binary_file(
+    exec_file: pathlib.Path | str,
+    output_file: pathlib.Path | str = "",
+    open_export: bool = True,
+    override: bool = False,
+    backend: DisassemblerBackend = DisassemblerBackend.IDA,
+    timeout: float | None = None,
+    executor: Executor | None = None,
+) -> ProgramBinExport | bool:
+    """
+    Asynchronous counterpart of :py:meth:`ProgramBinExport.from_binary_file`.
+
+    :param exec_file: executable file path
+    :param output_file: BinExport output file (default: next to the executable)
+    :param open_export: whether or not to open the binexport after export
+    :param override: Override the .BinExport if already existing. (default false)
+    :param backend: The backend to use. (Either 'IDA' or 'Ghidra')
+    :param timeout: timeout of the export (in seconds), None for no timeout
+    :param executor: executor parsing the BinExport file
+    :return: an instance of ProgramBinExport if open_export is true, else boolean
+             on whether it succeeded
+    """
+    success = await export_binary(exec_file, output_file, override, backend, timeout)
+    if not success or not open_export:
+        return success
+    return await load_program(output_file or str(exec_file) + ".BinExport", executor)
+
+
+class AsyncExporter:
+    """
+    Asynchronous exports and loads with concurrency limits: a single event loop can drive
+    many of them at once, the number of backends running and of files being parsed are
+    bounded by semaphores rather than by threads waiting for them.
+    """
+
+    def __init__(
+        self,
+        max_exports: int = 4,
+        max_loads: int = 4,
+        timeout: float | None = None,
+        backend: DisassemblerBackend = DisassemblerBackend.IDA,
+        executor: Executor | None = None,
+    ):
+        """
+        :param max_exports: maximum number of backends running at the same time
+        :param max_loads: maximum number of BinExport files parsed at the same time
+        :param timeout: timeout of an export (in seconds), None for no timeout
+        :param backend: The backend to use. (Either 'IDA' or 'Ghidra')
+        :param executor: executor parsing the BinExport files (default: the loop one)
+        """
+        self.timeout = timeout
+        self.backend = backend
+        self.executor = executor
+        self._exports = asyncio.Semaphore(max_exports)
+        self._loads = asyncio.Semaphore(max_loads)
+
+    async def export(
+        self,
+        exec_file: pathlib.Path | str,
+        output_file: pathlib.Path | str = "",
+        override: bool = False,
+    ) -> bool:
+        """
+        Export a binary, waiting for a backend slot (see :py:func:`export_binary`).
+
+        :param exec_file: executable file path
+        :param output_file: BinExport output file (default: next to the executable)
+        :param override: Override the .BinExport if already existing. (default false)
+        :return: whether the export succeeded
+        """
+        async with self._exports:
+            return await export_binary(exec_file, output_file, override, self.backend, self.timeout)
+
+    async def load(self, file: pathlib.Path | str, **program_kwargs: Any) -> ProgramBinExport:
+        """
+        Load a BinExport file, waiting for a parsing slot (see :py:func:`load_program`).
+
+        :param file: BinExport file path
+        :param program_kwargs: arguments of :py:class:`ProgramBinExport` (e.g. lazy, fields)
+        :return: the program
+        """
+        async with self._loads:
+            return await load_program(file, self.executor, **program_kwargs)
+
+    async def from_binary_file(
+        self,
+        exec_file: pathlib.Path | str,
+        output_file: pathlib.Path | str = "",
+        open_export: bool = True,
+        override: bool = False,
+    ) -> ProgramBinExport | bool:
+        """
+        Export a binary and load its BinExport file (see :py:func:`from_binary_file`).
+
+        :param exec_file: executable file path
+        :param output_file: BinExport output file (default: next to the executable)
+        :param open_export: whether or not to open the binexport after export
+        :param override: Override the .BinExport if already existing. (default false)
+        :return: an instance of ProgramBinExport if open_export is true, else boolean
+                 on whether it succeeded
+        """
+        success = await self.export(exec_file, output_file, override)
+        if not success or not open_export:
+            return success
+        return await self.load(output_file or str(exec_file) + ".BinExport")
@@ -1,12 +1,13 @@
 from __future__ import annotations
-import weakref
 from functools import cached_property
 from typing import TYPE_CHECKING
 
-from binexport.utils import instruction_index_range, get_instruction_address
+from binexport.utils import instruction_index_range
 from binexport.instruction import InstructionBinExport
+from binexport.shared import _unpickle_basic_block
 
 if TYPE_CHECKING:
+    from binexport.context import Context
     from binexport.program import ProgramBinExport
     from binexport.function import FunctionBinExport
     from binexport.binexport2_pb2 import BinExport2
@@ -18,26 +19,18 @@ class BasicBlockBinExport:
     Basic block class.
     """
 
-    def __init__(
-        self,
-        program: weakref.ref[ProgramBinExport],
-        function: weakref.ref[FunctionBinExport],
-        pb_bb: BinExport2.BasicBlock,
-    ):
+    def __init__(self, context: Context, pb_bb: BinExport2.BasicBlock):
         """
-        :param program: Weak reference to the program
-        :param function: Weak reference to the function
+        :param context: context shared by the objects of the function
         :param pb_bb: protobuf definition of the basic block
         """
 
         super(BasicBlockBinExport, self).__init__()
 
-        self._program = program
-        self._function = function
+        self._ctx = context
         self.pb_bb = pb_bb
 
         self.addr: Addr = None  #: basic bloc address
-        self.bytes = b""  #: bytes of the basic block
         self._len = 0  #: Length of the basic block (number of instructions)
 
         # Ranges are in fact the true basic blocks but BinExport
@@ -45,13 +38,11 @@ class BasicBlockBinExport:
         # For example: BB_1 -- unconditional_jmp --> BB_2
         # might be merged into a single basic block so the edge gets lost.
         for rng in pb_bb.instruction_index:
-            for idx in instruction_index_range(rng):
-                self.bytes += self.program.proto.instruction[idx].raw_bytes
-                self._len += 1
-
-                # The first instruction determines the basic block address
-                if self.addr is None:
-                    self.addr = get_instruction_address(self.program.proto, idx)
+            indices = instruction_index_range(rng)
+            # The first instruction determines the basic block address
+            if self.addr is None and indices:
+                self.addr = self.program.instruction_address(indices[0])
+            self._len += len(indices)
 
     def __hash__(self) -> int:
         """
@@ -62,11 +53,21 @@ class BasicBlockBinExport:
         return hash(self.addr)
 
     def __str__(self) -> str:
-        return "\n".join(str(i) for i in self.instructions.values())
+        return "\n".join(
+            self.program.instruction_strings(
+                idx for rng in self.pb_bb.instruction_index for idx in instruction_index_range(rng)
+            )
+        )
 
     def __repr__(self) -> str:
         return "<%s:0x%x>" % (type(self).__name__, self.addr)
 
+    def __reduce__(self) -> tuple:
+        """
+        Pickle the basic block as a handle: its function and its address.
+        """
+        return _unpickle_basic_block, (self.function, self.addr)
+
     def __len__(self) -> int:
         return self._len
 
@@ -77,7 +78,7 @@ class BasicBlockBinExport:
 
         :return: object :py:class:`ProgramBinExport`, program associated to the basic block
         """
-        return self._program()
+        return self._ctx.program
 
     @property
     def function(self) -> FunctionBinExport:
@@ -86,7 +87,32 @@ class BasicBlockBinExport:
 
         :return: object :py:class:`FunctionBinExport`, function associated to the basic block
         """
-        return self._function()
+        return self._ctx.function
+
+    @cached_property
+    def bytes(self) -> bytes:
+        """
+        Bytes of the basic block. They are computed on first access and cached,
+        to erase the cache delete the attribute.
+        """
+        instructions = self.program.proto.instruction
+        return b"".join(
+            instructions[idx].raw_bytes
+            for rng in self.pb_bb.instruction_index
+            for idx in instruction_index_range(rng)
+        )
+
+    @property
+    def bytes_view(self) -> memoryview:
+        """
+        Read-only view on the bytes of the basic block. When the instructions of the
+        basic block are contiguous (the usual case) the view is taken on the code buffer
+        shared by the whole program, thus without copying any byte.
+        """
+        ranges = [instruction_index_range(rng) for rng in self.pb_bb.instruction_index]
+        if ranges and all(prev.stop == cur.start for prev, cur in zip(ranges, ranges[1:])):
+            return self.program.instruction_bytes_view(ranges[0].start, ranges[-1].stop)
+        return memoryview(self.bytes)
 
     @cached_property
     def instructions(self) -> dict[Addr, InstructionBinExport]:
@@ -104,12 +130,11 @@ class BasicBlockBinExport:
         # doesn't have the same basic block semantic and merge multiple basic blocks into one.
         # For example: BB_1 -- unconditional_jmp --> BB_2
         # might be merged into a single basic block so the edge gets lost.
+        addresses = self.program.instruction_addresses
         for rng in self.pb_bb.instruction_index:
             for idx in instruction_index_range(rng):
-                inst_addr = get_instruction_address(self.program.proto, idx)
+                inst_addr = addresses[idx]
 
-                instructions[inst_addr] = InstructionBinExport(
-                    self._program, self._function, inst_addr, idx
-                )
+                instructions[inst_addr] = InstructionBinExport(self._ctx, inst_addr, idx)
 
         return instructions
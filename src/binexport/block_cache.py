@@ -0,0 +1,158 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from binexport.basic_block import BasicBlockBinExport
+    from binexport.types import Addr
+
+
+class BlockCacheInfo(NamedTuple):
+    """
+    Statistics of a :py:class:`BlockCache`
+    """
+
+    hits: int  #: number of lookups served by the cache
+    misses: int  #: number of lookups that required loading the blocks
+    evictions: int  #: number of functions evicted
+    functions: int  #: number of functions currently cached
+    size: int  #: approximate size in bytes of the cached functions
+
+
+class BlockCache:
+    """
+    Least recently used cache of the basic blocks of functions, shared by all the
+    functions of a program. Cached basic blocks keep their instructions, operands
+    and expressions loaded until the function is evicted.
+
+    The cache can be bounded by a number of functions and/or an approximate memory
+    budget, estimated from the number of basic blocks and instructions of each function.
+    A cache without any bound (or bounded to 0 functions) is disabled, which is the
+    default: the basic blocks are then rebuilt on each access unless the function
+    is preloaded.
+    """
+
+    BLOCK_SIZE = 600  #: Approximate size in bytes of a loaded basic block
+    INSTRUCTION_SIZE = 800  #: Approximate size in bytes of a fully loaded instruction
+
+    def __init__(self, max_functions: int | None = None, max_bytes: int | None = None):
+        """
+        :param max_functions: maximum number of functions kept loaded
+        :param max_bytes: approximate memory budget in bytes
+        """
+        self.max_functions = max_functions  #: maximum number of functions kept loaded
+        self.max_bytes = max_bytes  #: approximate memory budget in bytes
+
+        self._entries: OrderedDict[Addr, tuple[dict[Addr, BasicBlockBinExport], int]] = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, addr: Addr) -> bool:
+        return addr in self._entries
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether the cache keeps any function loaded.
+        """
+        bounded = self.max_functions is not None or self.max_bytes is not None
+        return bounded and self.max_functions != 0
+
+    @classmethod
+    def estimate_size(cls, blocks: dict[Addr, BasicBlockBinExport]) -> int:
+        """
+        Approximate memory footprint of loaded basic blocks.
+
+        :param blocks: basic blocks of a function
+        :return: size in bytes
+        """
+        return sum(cls.BLOCK_SIZE + cls.INSTRUCTION_SIZE * len(bb) for bb in blocks.values())
+
+    def get(self, addr: Addr) -> dict[Addr, BasicBlockBinExport] | None:
+        """
+        Get the basic blocks of a function and mark it as recently used.
+
+        :param addr: function address
+        :return: dictionary of addresses to basic blocks, None if not cached
+        """
+        if not self.enabled:
+            return None
+        entry = self._entries.get(addr)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._entries.move_to_end(addr)
+        return entry[0]
+
+    def put(self, addr: Addr, blocks: dict[Addr, BasicBlockBinExport]) -> None:
+        """
+        Add the basic blocks of a function in the cache, evicting the least recently
+        used functions if needed.
+
+        :param addr: function address
+        :param blocks: dictionary of addresses to basic blocks
+        """
+        if not self.enabled:
+            return
+        self.discard(addr)
+        size = self.estimate_size(blocks)
+        self._entries[addr] = (blocks, size)
+        self._size += size
+        self._evict()
+
+    def discard(self, addr: Addr) -> None:
+        """
+        Remove a function from the cache.
+
+        :param addr: function address
+        """
+        entry = self._entries.pop(addr, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def clear(self) -> None:
+        """
+        Remove all the functions from the cache (statistics are kept).
+        """
+        self._entries.clear()
+        self._size = 0
+
+    def resize(self, max_functions: int | None = None, max_bytes: int | None = None) -> None:
+        """
+        Change the bounds of the cache, evicting functions if needed.
+
+        :param max_functions: maximum number of functions kept loaded
+        :param max_bytes: approximate memory budget in bytes
+        """
+        self.max_functions = max_functions
+        self.max_bytes = max_bytes
+        if self.enabled:
+            self._evict()
+        else:
+            self.clear()
+
+    def info(self) -> BlockCacheInfo:
+        """
+        Returns the statistics of the cache.
+        """
+        return BlockCacheInfo(
+            self._hits, self._misses, self._evictions, len(self._entries), self._size
+        )
+
+    def _evict(self) -> None:
+        # The most recently added function is always kept, even if it exceeds the budget
+        while len(self._entries) > 1 and (
+            (self.max_functions is not None and len(self._entries) > self.max_functions)
+            or (self.max_bytes is not None and self._size > self.max_bytes)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self._evictions += 1
@@ -0,0 +1,43 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import weakref
+    from binexport.program import ProgramBinExport
+    from binexport.function import FunctionBinExport
+
+
+class Context:
+    """
+    Context shared by all the objects (basic blocks, instructions, operands
+    and expressions) of a function. It holds the only references to the program
+    and the function, so that these objects do not need their own weak references.
+    """
+
+    __slots__ = ("_program", "_function")
+
+    def __init__(
+        self,
+        program: weakref.ref[ProgramBinExport],
+        function: weakref.ref[FunctionBinExport] | None = None,
+    ):
+        """
+        :param program: weak reference to the program
+        :param function: weak reference to the function, None for a program-wide context
+        """
+        self._program = program
+        self._function = function
+
+    @property
+    def program(self) -> ProgramBinExport:
+        """
+        Program of the context.
+        """
+        return self._program()
+
+    @property
+    def function(self) -> FunctionBinExport | None:
+        """
+        Function of the context, None for a program-wide context.
+        """
+        return self._function() if self._function is not None else None
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import sys
+import time
+import types
+import weakref
+import tracemalloc
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from google.protobuf.message import Message
+
+if TYPE_CHECKING:
+    from collections import abc
+
+
+class IndexInfo(NamedTuple):
+    """
+    Statistics of a derived index of a program, see :py:meth:`ProgramBinExport.index_info`.
+    """
+
+    name: str  #: name of the index (attribute of the program)
+    built: bool  #: whether the index is currently built
+    build_time: float | None  #: time spent building the index (in seconds)
+    size: int | None  #: memory allocated by the build if `tracemalloc` was tracing,
+    #: otherwise the deep size of the index (see :py:func:`deep_sizeof`)
+
+
+# Objects whose size is not accounted to an index referencing them
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType, weakref.ref, Message)
+
+
+def deep_sizeof(obj: Any, exclude: abc.Iterable[Any] = ()) -> int:
+    """
+    Memory used by an object and all the objects it references (containers contents,
+    array buffers, attributes), each counted once. Classes, modules, functions, weak
+    references and protobuf messages (owned by the program) are not followed.
+
+    :param obj: object to measure
+    :param exclude: objects not to account (e.g. the program owning the index)
+    :return: size in bytes
+    """
+    seen = {id(o) for o in exclude}
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, dict):
+            size += sys.getsizeof(obj)
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            size += sys.getsizeof(obj)
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__") or hasattr(type(obj), "__slots__"):
+            # Basic size of the instance (a custom __sizeof__ would count the attributes twice)
+            size += object.__sizeof__(obj)
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                slots = cls.__dict__.get("__slots__", ())
+                for slot in (slots,) if isinstance(slots, str) else slots:
+                    if hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+        else:  # Scalars, strings, bytes, arrays (with their buffer)
+            size += sys.getsizeof(obj)
+    return size
+
+
+class derived_index:
+    """
+    Decorator declaring a derived index of a program: a value computed from the
+    protobuf on first access and then stored on the program (as `functools.cached_property`),
+    whose build time and size are measured and which can be dropped to release memory.
+    Indexes are registered by name on the class, see :py:meth:`ProgramBinExport.register_index`.
+    """
+
+    def __init__(self, func: abc.Callable[[Any], Any]):
+        """
+        :param func: function computing the index from the program
+        """
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+        # Copy the registry so that subclasses do not register their indexes in the parent class
+        if "_derived_indexes" not in owner.__dict__:
+            owner._derived_indexes = dict(getattr(owner, "_derived_indexes", {}))
+        owner._derived_indexes[name] = self
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+
+        tracing = tracemalloc.is_tracing()
+        memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+        start = time.perf_counter()
+        value = self.func(instance)
+        build_time = time.perf_counter() - start
+        if tracing:
+            size = tracemalloc.get_traced_memory()[0] - memory
+        else:
+            size = deep_sizeof(value, exclude=(instance,))
+
+        # Stored in the instance dictionary, which takes precedence over this descriptor
+        instance.__dict__[self.name] = value
+        instance._index_stats[self.name] = (build_time, size)
+        return value
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from functools import cached_property
+import copy
 from typing import TYPE_CHECKING
 
 from binexport.binexport2_pb2 import BinExport2
@@ -7,6 +7,7 @@ from binexport.types import ExpressionType
 from binexport.utils import logger
 
 if TYPE_CHECKING:
+    from .context import Context
     from .program import ProgramBinExport
     from .function import FunctionBinExport
     from .instruction import InstructionBinExport
@@ -29,8 +30,15 @@ class ExpressionBinExport:
     """
     Class that represent an expression node in the expression tree for a specific
     operand. The tree is inverted (each node has an edge to its parent)
+
+    Expression nodes are shared by all the operands using them (see
+    :py:meth:`ProgramBinExport.expression`). The flags depending on the instruction,
+    `is_addr` and `is_data`, are always False on shared nodes and are resolved
+    by the operand with :py:meth:`ExpressionBinExport.bind`.
     """
 
+    __slots__ = ("_ctx", "_idx", "parent", "is_addr", "is_data", "_type", "_value", "_depth")
+
     __sz_lookup = {
         "b1": 1,
         "b2": 2,
@@ -54,34 +62,41 @@ class ExpressionBinExport:
 
     def __init__(
         self,
-        program: ProgramBinExport,
-        function: FunctionBinExport,
-        instruction: InstructionBinExport,
+        context: Context,
         exp_idx: int,
         parent: ExpressionBinExport | None = None,
     ):
         """
-        :param program: reference to program
-        :param function: reference to function
-        :param instruction: reference to instruction
+        :param context: program-wide context
         :param exp_idx: expression index in the protobuf table
         :param parent: reference to the parent expression in the tree.
                        None if it is the root.
         """
 
+        self._ctx = context
         self._idx = exp_idx
         self.parent: ExpressionBinExport | None = parent  #: parent expression if nested
         self.is_addr: bool = False  #: whether the value is referring to an address
         self.is_data: bool = False  #: whether the value is a reference to data
+        self._depth = None
 
-        # Expression object in the protobuf structure
-        self.pb_expr = program.proto.expression[self._idx]
-
-        self._parse_protobuf(program, function, instruction)
+        self._parse_protobuf(context.program)
 
     def __hash__(self) -> int:
         return hash(self._idx)
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExpressionBinExport):
+            return NotImplemented
+        return self._idx == other._idx and self._ctx.program is other._ctx.program
+
+    @property
+    def pb_expr(self) -> BinExport2.Expression:
+        """
+        Expression object in the protobuf structure
+        """
+        return self._ctx.program.proto.expression[self._idx]
+
     @property
     def type(self) -> ExpressionType:
         """
@@ -99,61 +114,80 @@ class ExpressionBinExport:
         """
         return self._value
 
-    @cached_property
+    @property
     def depth(self) -> int:
         """
         Returns the depth of the node in the tree (root is depth 0).
         """
-        if self.parent is None:
-            return 0
-        return self.parent.depth + 1
+        if self._depth is None:
+            self._depth = 0 if self.parent is None else self.parent.depth + 1
+        return self._depth
 
-    def _parse_protobuf(
-        self,
-        program: ProgramBinExport,
-        function: FunctionBinExport,
-        instruction: InstructionBinExport,
-    ) -> None:
+    def bind(
+        self, instruction: InstructionBinExport, function: FunctionBinExport | None
+    ) -> ExpressionBinExport:
+        """
+        Resolve the flags depending on the instruction (`is_addr`, `is_data`).
+        If any of them is set a copy of the node is returned, otherwise the shared
+        node itself is returned.
+
+        :param instruction: instruction using the expression
+        :param function: function of the instruction
+        :return: expression with the flags set for the instruction
+        """
+        if self._type != ExpressionType.IMMEDIATE_INT:
+            return self
+
+        program = self._ctx.program
+        immediate = self.pb_expr.immediate
+        if immediate in instruction.data_refs:  # Data
+            is_addr, is_data = True, True
+        elif immediate in program or (function is not None and immediate in function):  # Address
+            is_addr, is_data = True, False
+        else:
+            return self
+
+        expr = copy.copy(self)
+        expr.is_addr = is_addr
+        expr.is_data = is_data
+        return expr
+
+    def _parse_protobuf(self, program: ProgramBinExport) -> None:
         """
         Low-level expression parser. It populates self._type and self._value
         """
-        if self.pb_expr.type == BinExport2.Expression.SYMBOL:
-            self._value = self.pb_expr.symbol
+        pb_expr = program.proto.expression[self._idx]
+        if pb_expr.type == BinExport2.Expression.SYMBOL:
+            self._value = pb_expr.symbol
 
-            if self.pb_expr.symbol in program.fun_names:  # It is a function name
+            if pb_expr.symbol in program.fun_names:  # It is a function name
                 self._type = ExpressionType.FUNC_NAME
             else:  # It is a local symbol (ex: var_, arg_)
                 self._type = ExpressionType.VAR_NAME
 
-        elif self.pb_expr.type == BinExport2.Expression.IMMEDIATE_INT:
+        elif pb_expr.type == BinExport2.Expression.IMMEDIATE_INT:
             self._type = ExpressionType.IMMEDIATE_INT
-            self._value = to_signed(self.pb_expr.immediate, program.mask)
-
-            if self.pb_expr.immediate in instruction.data_refs:  # Data
-                self.is_addr = True
-                self.is_data = True
-            elif self.pb_expr.immediate in program or self.pb_expr.immediate in function:  # Address
-                self.is_addr = True
+            self._value = to_signed(pb_expr.immediate, program.mask)
 
-        elif self.pb_expr.type == BinExport2.Expression.IMMEDIATE_FLOAT:
+        elif pb_expr.type == BinExport2.Expression.IMMEDIATE_FLOAT:
             self._type = ExpressionType.IMMEDIATE_FLOAT
-            self._value = self.pb_expr.immediate  # Cast it to float
+            self._value = pb_expr.immediate  # Cast it to float
 
-        elif self.pb_expr.type == BinExport2.Expression.OPERATOR:
+        elif pb_expr.type == BinExport2.Expression.OPERATOR:
             self._type = ExpressionType.SYMBOL
-            self._value = self.pb_expr.symbol
+            self._value = pb_expr.symbol
 
-        elif self.pb_expr.type == BinExport2.Expression.REGISTER:
+        elif pb_expr.type == BinExport2.Expression.REGISTER:
             self._type = ExpressionType.REGISTER
-            self._value = self.pb_expr.symbol
+            self._value = pb_expr.symbol
 
-        elif self.pb_expr.type == BinExport2.Expression.SIZE_PREFIX:
+        elif pb_expr.type == BinExport2.Expression.SIZE_PREFIX:
             self._type = ExpressionType.SIZE
-            self._value = self.__sz_lookup[self.pb_expr.symbol]
+            self._value = self.__sz_lookup[pb_expr.symbol]
 
-        elif self.pb_expr.type == BinExport2.Expression.DEREFERENCE:
+        elif pb_expr.type == BinExport2.Expression.DEREFERENCE:
             self._type = ExpressionType.SYMBOL
-            self._value = self.pb_expr.symbol
+            self._value = pb_expr.symbol
 
         else:
-            logger.error(f"Malformed protobuf message. Invalid expression type {self.pb_expr.type}")
+            logger.error(f"Malformed protobuf message. Invalid expression type {pb_expr.type}")
@@ -0,0 +1,277 @@
+from __future__ import annotations
+import array
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from binexport.binexport2_pb2 import BinExport2
+from binexport.utils import instruction_index_range
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if TYPE_CHECKING:
+    from binexport.program import ProgramBinExport
+    from binexport.types import Addr
+
+
+STRUCTURAL_COLUMNS = ["instructions", "basic_blocks", "edges", "calls_in", "calls_out"]
+"""Columns computed from the function structure"""
+
+EXPRESSION_COLUMNS = [
+    f"expression:{value.name}"
+    for value in BinExport2.Expression.DESCRIPTOR.enum_types_by_name["Type"].values
+]
+"""Columns counting the operands expressions of each type"""
+
+
+class FeatureMatrix(NamedTuple):
+    """
+    Feature matrix of the functions of a program, with one row per function.
+    The data is a NumPy array of shape (functions, columns) if NumPy is installed,
+    otherwise a flat row-major `array.array`.
+    """
+
+    functions: array.array  #: address of the function of each row
+    columns: list[str]  #: name of each column
+    data: Any  #: feature values (`numpy.ndarray` or `array.array`)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """
+        Number of rows and columns of the matrix
+        """
+        return len(self.functions), len(self.columns)
+
+    def row(self, i: int) -> list[int]:
+        """
+        Feature values of a function.
+
+        :param i: row of the function
+        :return: values of the row
+        """
+        if numpy is not None:
+            return self.data[i].tolist()
+        width = len(self.columns)
+        return self.data[i * width : (i + 1) * width].tolist()
+
+
+def feature_columns(mnemonics: Iterable[str]) -> list[str]:
+    """
+    Column vocabulary of a feature matrix: the structural columns, the expression
+    type columns and then one column per mnemonic.
+
+    :param mnemonics: mnemonics vocabulary
+    :return: name of the columns
+    """
+    return STRUCTURAL_COLUMNS + EXPRESSION_COLUMNS + [f"mnemonic:{m}" for m in mnemonics]
+
+
+def compute_feature_matrix(
+    program: ProgramBinExport, mnemonics: Iterable[str] | None = None
+) -> FeatureMatrix:
+    """
+    Compute the feature matrix of all the functions of a program (imported ones included)
+    straight from the protobuf tables, without instantiating any function, basic block
+    or instruction object. Features are the number of instructions, basic blocks, CFG edges,
+    callers and callees, the number of operand expressions of each type and the mnemonic
+    histogram. Counts are computed with array operations when NumPy is installed.
+
+    :param program: program to featurize
+    :param mnemonics: mnemonics vocabulary (by default the sorted mnemonics of the program).
+                      Give the same vocabulary to get comparable matrices across programs,
+                      mnemonics out of the vocabulary are not counted.
+    :return: the feature matrix
+    """
+    pb = program.proto
+    program_mnemonics = program._mnemonics
+    vocabulary = sorted(set(program_mnemonics)) if mnemonics is None else list(mnemonics)
+    columns = feature_columns(vocabulary)
+    width = len(columns)
+
+    # Column of each mnemonic of the program (None when out of the vocabulary)
+    mnemonic_offset = len(STRUCTURAL_COLUMNS) + len(EXPRESSION_COLUMNS)
+    vocabulary_index = {m: mnemonic_offset + i for i, m in enumerate(vocabulary)}
+    mnemonic_column = [vocabulary_index.get(m) for m in program_mnemonics]
+
+    # Columns incremented by each operand (one per expression)
+    type_column = {
+        value.number: len(STRUCTURAL_COLUMNS) + i
+        for i, value in enumerate(
+            BinExport2.Expression.DESCRIPTOR.enum_types_by_name["Type"].values
+        )
+    }
+    expression_column = [type_column[expr.type] for expr in pb.expression]
+
+    functions = array.array("Q", program.keys())
+    rows = {addr: i for i, addr in enumerate(functions)}
+    if numpy is not None:
+        data = _count_instructions_numpy(program, rows, width, mnemonic_column, expression_column)
+        flat = data.reshape(-1)
+    else:
+        data = flat = _count_instructions(program, rows, width, mnemonic_column, expression_column)
+
+    # Structural features (columns following the instructions one), filled column-wise
+    flow_graphs = pb.flow_graph
+    callgraph = program.callgraph_csr
+    structural = [array.array("I", bytes(4 * len(rows))) for _ in range(4)]
+    n_blocks, n_edges, calls_in, calls_out = structural
+    for addr, row in rows.items():
+        fg_idx = program._function_index[addr]
+        if fg_idx is not None:
+            n_blocks[row] = len(flow_graphs[fg_idx].basic_block_index)
+            n_edges[row] = len(flow_graphs[fg_idx].edge)
+        if addr in callgraph:
+            calls_in[row] = callgraph.in_degree(addr)
+            calls_out[row] = callgraph.out_degree(addr)
+    for col, values in enumerate(structural, 1):
+        flat[col::width] = values
+    return FeatureMatrix(functions, columns, data)
+
+
+def _count_instructions(
+    program: ProgramBinExport,
+    rows: dict[Addr, int],
+    width: int,
+    mnemonic_column: list[int | None],
+    expression_column: list[int],
+) -> array.array:
+    """
+    Instructions, mnemonics and expression types counts of the functions, as a flat
+    row-major array (pure Python version, used when NumPy is not installed).
+    """
+    pb = program.proto
+    operand_columns = [
+        [expression_column[idx] for idx in operand.expression_index] for operand in pb.operand
+    ]
+
+    # Instructions with the same mnemonic and operands increment the same columns, thus
+    # they share a signature (by instruction index) and only signatures are counted
+    mnemonic_index, operand_ptr, operand_index = program._instruction_columns
+    signature_ids = {}
+    signatures = []  # Columns incremented by each signature
+    instruction_signature = array.array("I")
+    for idx, mnem in enumerate(mnemonic_index):
+        operands = operand_index[operand_ptr[idx] : operand_ptr[idx + 1]]
+        key = (mnem, operands.tobytes())
+        sig = signature_ids.get(key)
+        if sig is None:
+            sig = signature_ids[key] = len(signatures)
+            cols = [0]  # instructions column
+            if mnemonic_column[mnem] is not None:
+                cols.append(mnemonic_column[mnem])
+            for op_idx in operands:
+                cols.extend(operand_columns[op_idx])
+            signatures.append(cols)
+        instruction_signature.append(sig)
+
+    data = array.array("I", bytes(4 * len(rows) * width))
+    basic_blocks = pb.basic_block
+    counts = defaultdict(Counter)  # {function address -> {signature -> count}}
+    for fun_addr, bb_idx in program._function_blocks():
+        for rng in basic_blocks[bb_idx].instruction_index:
+            indices = instruction_index_range(rng)
+            counts[fun_addr].update(instruction_signature[indices.start : indices.stop])
+    for fun_addr, counter in counts.items():
+        base = rows[fun_addr] * width
+        for sig, count in counter.items():
+            for col in signatures[sig]:
+                data[base + col] += count
+    return data
+
+
+def _count_instructions_numpy(
+    program: ProgramBinExport,
+    rows: dict[Addr, int],
+    width: int,
+    mnemonic_column: list[int | None],
+    expression_column: list[int],
+) -> numpy.ndarray:
+    """
+    Instructions, mnemonics and expression types counts of the functions, as an array
+    of shape (functions, columns) computed with array operations.
+    """
+    pb = program.proto
+    count = len(rows)
+
+    # Instruction ranges of the basic blocks (CSR layout), read in a single pass
+    block_ranges = numpy.fromiter(
+        (
+            (bb_idx, rng.begin_index, rng.end_index)
+            for bb_idx, bb in enumerate(pb.basic_block)
+            for rng in bb.instruction_index
+        ),
+        dtype=numpy.dtype((numpy.int64, 3)),
+    ).reshape(-1, 3)
+    range_counts = numpy.bincount(block_ranges[:, 0], minlength=len(pb.basic_block))
+    begins = block_ranges[:, 1]
+    ends = numpy.where(block_ranges[:, 2] > 0, block_ranges[:, 2], begins + 1)  # single instruction
+    range_ptr = numpy.zeros(len(range_counts) + 1, dtype=numpy.int64)
+    numpy.cumsum(range_counts, out=range_ptr[1:])
+
+    # Basic blocks of each function row
+    flow_graphs = pb.flow_graph
+    blocks, block_counts, function_rows = array.array("q"), array.array("q"), array.array("q")
+    for addr, fg_idx in program._function_index.items():
+        if fg_idx is not None:
+            block_indices = flow_graphs[fg_idx].basic_block_index
+            blocks.extend(block_indices)
+            block_counts.append(len(block_indices))
+            function_rows.append(rows[addr])
+    blocks = numpy.frombuffer(blocks, dtype=numpy.int64)
+    block_rows = numpy.repeat(
+        numpy.frombuffer(function_rows, dtype=numpy.int64),
+        numpy.frombuffer(block_counts, dtype=numpy.int64),
+    )
+
+    # Instruction ranges of the functions, then occurrences of the instructions in the
+    # functions: instruction index and function row
+    ranges = _expand_ranges(range_ptr[blocks], range_ptr[blocks + 1])
+    range_rows = numpy.repeat(block_rows, range_counts[blocks])
+    lengths = ends[ranges] - begins[ranges]
+    occ_row = numpy.repeat(range_rows, lengths)
+    occ_inst = _expand_ranges(begins[ranges], ends[ranges])
+
+    # Instructions (column 0) and mnemonics columns, counted on `row * width + column`
+    mnemonic_index, operand_ptr, operand_index = (
+        numpy.frombuffer(column, dtype=numpy.uint32) for column in program._instruction_columns
+    )
+    inst_mnemonic = numpy.array(
+        [-1 if c is None else c for c in mnemonic_column], dtype=numpy.int64
+    )
+    occ_mnemonic = inst_mnemonic[mnemonic_index][occ_inst]
+    known = occ_mnemonic >= 0
+    data = numpy.bincount(occ_row * width, minlength=count * width)
+    data += numpy.bincount(occ_row[known] * width + occ_mnemonic[known], minlength=count * width)
+    data = data.reshape(count, width)
+
+    # Expressions of each type in each operand, then in each instruction (sum over its
+    # operands), counted in the function rows of the instruction occurrences
+    expr_lengths = numpy.fromiter((len(op.expression_index) for op in pb.operand), numpy.int64)
+    expressions = numpy.fromiter(
+        (idx for op in pb.operand for idx in op.expression_index), numpy.int64
+    )
+    expr_columns = numpy.asarray(expression_column, dtype=numpy.int64)[expressions]
+    expr_operands = numpy.repeat(numpy.arange(len(expr_lengths)), expr_lengths)
+    inst_operands = numpy.repeat(numpy.arange(len(mnemonic_index)), numpy.diff(operand_ptr))
+    for col in numpy.unique(expr_columns):
+        operand_counts = numpy.bincount(
+            expr_operands[expr_columns == col], minlength=len(expr_lengths)
+        )
+        inst_counts = numpy.bincount(
+            inst_operands, weights=operand_counts[operand_index], minlength=len(mnemonic_index)
+        )
+        function_counts = numpy.bincount(occ_row, weights=inst_counts[occ_inst], minlength=count)
+        data[:, col] += function_counts.astype(numpy.int64)  # exact, weights are small integers
+    return data.astype(numpy.uint32)
+
+
+def _expand_ranges(starts: numpy.ndarray, stops: numpy.ndarray) -> numpy.ndarray:
+    """
+    Concatenation of the integer ranges [start, stop) given by two arrays.
+    """
+    lengths = stops - starts
+    offsets = numpy.repeat(starts - (lengths.cumsum() - lengths), lengths)
+    return numpy.arange(len(offsets)) + offsets
@@ -4,8 +4,11 @@ import networkx
 from functools import cached_property
 from typing import TYPE_CHECKING
 
-from binexport.utils import get_basic_block_addr, logger
+from binexport.utils import logger, instruction_index_range
 from binexport.basic_block import BasicBlockBinExport
+from binexport.context import Context
+from binexport.graph import CSRGraph
+from binexport.shared import _unpickle_function
 from binexport.types import FunctionType
 
 if TYPE_CHECKING:
@@ -41,11 +44,12 @@ class FunctionBinExport:
         super(FunctionBinExport, self).__init__()
 
         self.addr: Addr | None = addr  #: address, None if imported function
-        self.parents: set[FunctionBinExport] = set()  #: set of function call this one
-        self.children: set[FunctionBinExport] = set()  #: set of functions called by this one
 
         # Private attributes
-        self._graph = None  # CFG. Loaded inside self.blocks
+        self._parents = None  # Loaded from the program call graph on first access
+        self._children = None  # Loaded from the program call graph on first access
+        self._cfg = None  # Compact CFG. Loaded on first access
+        self._graph = None  # networkx CFG. Built from the compact one on first access
         self._type = None  # Set by the Program constructor
         self._name = None  # Set by the Program constructor
         self._program = program
@@ -60,7 +64,7 @@ class FunctionBinExport:
 
         assert pb_fun is not None, "pb_fun must be provided"
 
-        self.addr = get_basic_block_addr(self.program.proto, pb_fun.entry_basic_block_index)
+        self.addr = self.program.basic_block_address(pb_fun.entry_basic_block_index)
 
     def __hash__(self) -> int:
         """
@@ -73,6 +77,13 @@ class FunctionBinExport:
     def __repr__(self) -> str:
         return "<%s: 0x%x>" % (type(self).__name__, self.addr)
 
+    def __reduce__(self) -> tuple:
+        """
+        Pickle the function as a handle: its program (pickled once per pickle, see
+        :py:meth:`ProgramBinExport.__reduce__`) and its address.
+        """
+        return _unpickle_function, (self.program, self.addr)
+
     def __enter__(self) -> None:
         """Preload basic blocks and don't deallocate them until __exit__ is called"""
 
@@ -133,7 +144,7 @@ class FunctionBinExport:
         :param item: basic block address
         :return: true if basic block address into this function
         """
-        return item in self.blocks
+        return item in self.cfg
 
     @property
     def program(self) -> ProgramBinExport:
@@ -142,6 +153,32 @@ class FunctionBinExport:
         """
         return self._program()
 
+    @property
+    def parents(self) -> set[FunctionBinExport]:
+        """
+        Set of functions calling this one.
+        """
+        if self._parents is None:
+            callgraph = self.program.callgraph_csr
+            if self.addr in callgraph:
+                self._parents = {self.program[a] for a in callgraph.predecessors(self.addr)}
+            else:
+                self._parents = set()
+        return self._parents
+
+    @property
+    def children(self) -> set[FunctionBinExport]:
+        """
+        Set of functions called by this one.
+        """
+        if self._children is None:
+            callgraph = self.program.callgraph_csr
+            if self.addr in callgraph:
+                self._children = {self.program[a] for a in callgraph.successors(self.addr)}
+            else:
+                self._children = set()
+        return self._children
+
     @property
     def blocks(self) -> dict[Addr, BasicBlockBinExport]:
         """
@@ -150,6 +187,8 @@ class FunctionBinExport:
         By default the object returned is not cached, calling this function multiple times will
         create the same object multiple times. If you want to cache the object you
         should use the context manager of the function or calling the function `FunctionBinExport.load`.
+        Otherwise, the program :py:attr:`ProgramBinExport.block_cache` can be configured
+        to keep the most recently used functions loaded.
         Ex:
 
         .. code-block:: python
@@ -173,26 +212,23 @@ class FunctionBinExport:
 
         # Fast return if it is a imported function
         if self.is_import():
-            if self._graph is None:
-                self._graph = networkx.DiGraph()
             return {}
 
         # Add a sanity check to prevent error, for some reason _pb_fun may be undefined
         if not self._pb_fun:
             return {}
 
+        block_cache = self.program.block_cache
+        bblocks = block_cache.get(self.addr)
+        if bblocks is not None:
+            return bblocks
+
         bblocks = {}  # {addr : BasicBlockBinExport}
-        load_graph = False
-        if self._graph is None:
-            self._graph = networkx.DiGraph()
-            load_graph = True
 
         # Load the basic blocks
-        bb_i2a = {}  # Map {basic block index -> basic block address}
+        context = Context(self._program, weakref.ref(self))
         for bb_idx in self._pb_fun.basic_block_index:
-            basic_block = BasicBlockBinExport(
-                self._program, weakref.ref(self), self.program.proto.basic_block[bb_idx]
-            )
+            basic_block = BasicBlockBinExport(context, self.program.proto.basic_block[bb_idx])
 
             if basic_block.addr in bblocks:
                 logger.error(
@@ -200,33 +236,76 @@ class FunctionBinExport:
                 )
 
             bblocks[basic_block.addr] = basic_block
-            bb_i2a[bb_idx] = basic_block.addr
-            if load_graph:
-                self._graph.add_node(basic_block.addr)
 
-        # Load the edges between blocks
-        if load_graph:
-            for edge in self._pb_fun.edge:
-                # Source will always be in a basic block
-                bb_src = bb_i2a[edge.source_basic_block_index]
+        block_cache.put(self.addr, bblocks)
+        return bblocks
 
-                # Target might be a different function and not a basic block.
-                # e.g. in case of a jmp to another function (or a `bl` in ARM)
-                if edge.target_basic_block_index not in bb_i2a:
-                    continue
+    def render_listing(self) -> str:
+        """
+        Render the text listing of the function, one instruction per line
+        prefixed by its address, following the basic blocks order. It relies on
+        the strings cached by the program and does not instantiate any basic block,
+        instruction or operand object.
 
-                bb_dst = bb_i2a[edge.target_basic_block_index]
-                self._graph.add_edge(bb_src, bb_dst)
+        :return: listing of the function
+        """
+        if self.is_import() or not self._pb_fun:
+            return ""
+
+        program = self.program
+        pb = program.proto
+        addresses = program.instruction_addresses
+        indices = [
+            idx
+            for bb_idx in self._pb_fun.basic_block_index
+            for rng in pb.basic_block[bb_idx].instruction_index
+            for idx in instruction_index_range(rng)
+        ]
+        return "\n".join(
+            f"{addresses[idx]:#08x}: {text}"
+            for idx, text in zip(indices, program.instruction_strings(indices))
+        )
 
-        return bblocks
+    @property
+    def cfg(self) -> CSRGraph:
+        """
+        The compact CFG associated to the function (nodes are basic block addresses),
+        with the edges type and back edge flag. It is loaded without instantiating
+        the basic blocks.
+        """
+        if self._cfg is None:
+            if self.is_import() or not self._pb_fun:
+                self._cfg = CSRGraph([], [])
+                return self._cfg
+
+            program = self.program
+            # Map {basic block index -> basic block address}
+            bb_i2a = {
+                bb_idx: program.basic_block_address(bb_idx)
+                for bb_idx in self._pb_fun.basic_block_index
+            }
+            # Target might be a different function and not a basic block.
+            # e.g. in case of a jmp to another function (or a `bl` in ARM)
+            edges = [e for e in self._pb_fun.edge if e.target_basic_block_index in bb_i2a]
+            self._cfg = CSRGraph(
+                bb_i2a.values(),
+                (
+                    (bb_i2a[e.source_basic_block_index], bb_i2a[e.target_basic_block_index])
+                    for e in edges
+                ),
+                edge_types=(e.type for e in edges),
+                back_edges=(e.is_back_edge for e in edges),
+            )
+        return self._cfg
 
     @property
     def graph(self) -> networkx.DiGraph:
         """
-        The networkx CFG associated to the function.
+        The networkx CFG associated to the function, built from :py:attr:`FunctionBinExport.cfg`
+        on first access. Edges have the `type` and `is_back_edge` attributes.
         """
         if self._graph is None:
-            _ = self.blocks  # Load the CFG
+            self._graph = self.cfg.to_networkx()
         return self._graph
 
     @property
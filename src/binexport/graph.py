@@ -0,0 +1,236 @@
+from __future__ import annotations
+import array
+import networkx
+from collections import deque
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from binexport.types import Addr
+
+
+class CSRGraph:
+    """
+    Compact directed graph (without parallel edges) whose nodes are addresses.
+    Edges are stored in contiguous integer arrays, both in CSR layout (for the
+    successors) and CSC layout (for the predecessors), along with optional edge
+    attributes (the protobuf edge type and back edge flag). A networkx view of
+    the graph can be built on demand with :py:meth:`CSRGraph.to_networkx`.
+    """
+
+    def __init__(
+        self,
+        nodes: Iterable[Addr],
+        edges: Iterable[tuple[Addr, Addr]],
+        edge_types: Iterable[int] | None = None,
+        back_edges: Iterable[bool] | None = None,
+    ):
+        """
+        :param nodes: nodes of the graph. Nodes appearing in the edges are added
+                      after them (in order of appearance) if not already present.
+        :param edges: edges as (source, target) pairs. Duplicated edges are ignored.
+        :param edge_types: type of each edge (e.g. BinExport2.FlowGraph.Edge.Type)
+        :param back_edges: whether each edge is a back edge
+        """
+        self._index: dict[Addr, int] = {}
+        for node in nodes:
+            self._index.setdefault(node, len(self._index))
+
+        sources, targets, types, backs = [], [], [], []
+        seen = set()
+        edge_types = iter(edge_types) if edge_types is not None else None
+        back_edges = iter(back_edges) if back_edges is not None else None
+        for src, dst in edges:
+            e_type = next(edge_types) if edge_types is not None else 0
+            e_back = next(back_edges) if back_edges is not None else False
+            s = self._index.setdefault(src, len(self._index))
+            d = self._index.setdefault(dst, len(self._index))
+            if (s, d) in seen:
+                continue
+            seen.add((s, d))
+            sources.append(s)
+            targets.append(d)
+            types.append(e_type)
+            backs.append(e_back)
+
+        self._nodes = array.array("Q", self._index)
+        self._has_types = edge_types is not None
+        self._has_back_edges = back_edges is not None
+
+        # CSR layout: edges sorted by source
+        order = sorted(range(len(sources)), key=sources.__getitem__)
+        self._succ_ptr = self._pointers(sources, len(self._nodes))
+        self._succ = array.array("I", (targets[i] for i in order))
+        self._types = array.array("B", (types[i] for i in order))
+        self._back_edges = array.array("B", (backs[i] for i in order))
+
+        # CSC layout: edges sorted by target
+        csr_sources = [sources[i] for i in order]
+        csr_targets = list(self._succ)
+        rorder = sorted(range(len(csr_targets)), key=csr_targets.__getitem__)
+        self._pred_ptr = self._pointers(csr_targets, len(self._nodes))
+        self._pred = array.array("I", (csr_sources[i] for i in rorder))
+
+    @staticmethod
+    def _pointers(keys: list[int], count: int) -> array.array:
+        """
+        Compute the CSR offsets array of the given (unsorted) node indices.
+        """
+        ptr = array.array("I", bytes(4 * (count + 1)))
+        for key in keys:
+            ptr[key + 1] += 1
+        for i in range(count):
+            ptr[i + 1] += ptr[i]
+        return ptr
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node: Addr) -> bool:
+        return node in self._index
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sum(
+            value.__sizeof__() for value in vars(self).values() if not isinstance(value, bool)
+        )
+
+    def __iter__(self) -> Iterator[Addr]:
+        return iter(self._nodes)
+
+    @property
+    def nodes(self) -> array.array:
+        """
+        Nodes of the graph
+        """
+        return self._nodes
+
+    def number_of_edges(self) -> int:
+        """
+        Returns the number of edges of the graph
+        """
+        return len(self._succ)
+
+    def edges(self) -> Iterator[tuple[Addr, Addr]]:
+        """
+        Iterates over the edges of the graph as (source, target) pairs
+        """
+        nodes, succ, ptr = self._nodes, self._succ, self._succ_ptr
+        for i, src in enumerate(nodes):
+            for j in range(ptr[i], ptr[i + 1]):
+                yield src, nodes[succ[j]]
+
+    def successors(self, node: Addr) -> Iterator[Addr]:
+        """
+        Iterates over the successors of a node
+
+        :param node: node of the graph
+        :return: iterator over the successors
+        """
+        i = self._index[node]
+        nodes = self._nodes
+        return (nodes[j] for j in self._succ[self._succ_ptr[i] : self._succ_ptr[i + 1]])
+
+    def predecessors(self, node: Addr) -> Iterator[Addr]:
+        """
+        Iterates over the predecessors of a node
+
+        :param node: node of the graph
+        :return: iterator over the predecessors
+        """
+        i = self._index[node]
+        nodes = self._nodes
+        return (nodes[j] for j in self._pred[self._pred_ptr[i] : self._pred_ptr[i + 1]])
+
+    def out_degree(self, node: Addr) -> int:
+        """
+        Number of successors of a node
+        """
+        i = self._index[node]
+        return self._succ_ptr[i + 1] - self._succ_ptr[i]
+
+    def in_degree(self, node: Addr) -> int:
+        """
+        Number of predecessors of a node
+        """
+        i = self._index[node]
+        return self._pred_ptr[i + 1] - self._pred_ptr[i]
+
+    def edge_attributes(self, src: Addr, dst: Addr) -> dict[str, int | bool]:
+        """
+        Attributes of an edge (`type` and `is_back_edge` when available).
+
+        :param src: source of the edge
+        :param dst: target of the edge
+        :return: dictionary of attributes
+        """
+        s, d = self._index[src], self._index[dst]
+        for j in range(self._succ_ptr[s], self._succ_ptr[s + 1]):
+            if self._succ[j] == d:
+                return self._attributes(j)
+        raise KeyError((src, dst))
+
+    def _attributes(self, edge: int) -> dict[str, int | bool]:
+        attributes = {}
+        if self._has_types:
+            attributes["type"] = self._types[edge]
+        if self._has_back_edges:
+            attributes["is_back_edge"] = bool(self._back_edges[edge])
+        return attributes
+
+    def bfs(self, source: Addr) -> Iterator[Addr]:
+        """
+        Breadth-first traversal of the nodes reachable from `source` (included).
+
+        :param source: node to start from
+        :return: iterator over the nodes
+        """
+        nodes, succ, ptr = self._nodes, self._succ, self._succ_ptr
+        start = self._index[source]
+        visited = bytearray(len(nodes))
+        visited[start] = 1
+        queue = deque([start])
+        while queue:
+            i = queue.popleft()
+            yield nodes[i]
+            for j in succ[ptr[i] : ptr[i + 1]]:
+                if not visited[j]:
+                    visited[j] = 1
+                    queue.append(j)
+
+    def dfs(self, source: Addr) -> Iterator[Addr]:
+        """
+        Depth-first traversal (pre-order) of the nodes reachable from `source` (included).
+
+        :param source: node to start from
+        :return: iterator over the nodes
+        """
+        nodes, succ, ptr = self._nodes, self._succ, self._succ_ptr
+        visited = bytearray(len(nodes))
+        stack = [self._index[source]]
+        while stack:
+            i = stack.pop()
+            if visited[i]:
+                continue
+            visited[i] = 1
+            yield nodes[i]
+            # Reversed so that successors are visited in order
+            stack.extend(j for j in reversed(succ[ptr[i] : ptr[i + 1]]) if not visited[j])
+
+    def to_networkx(self) -> networkx.DiGraph:
+        """
+        Build the networkx equivalent of the graph (with the edges attributes).
+
+        :return: networkx directed graph
+        """
+        graph = networkx.DiGraph()
+        graph.add_nodes_from(self._nodes)
+        nodes, succ, ptr = self._nodes, self._succ, self._succ_ptr
+        if self._has_types or self._has_back_edges:
+            graph.add_edges_from(
+                (nodes[i], nodes[succ[j]], self._attributes(j))
+                for i in range(len(nodes))
+                for j in range(ptr[i], ptr[i + 1])
+            )
+        else:
+            graph.add_edges_from(self.edges())
+        return graph
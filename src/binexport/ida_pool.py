@@ -0,0 +1,239 @@
+from __future__ import annotations
+import os
+import sys
+import json
+import queue
+import signal
+import threading
+import subprocess
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from binexport.ida_worker import RESPONSE_PREFIX
+from binexport.utils import logger
+
+if TYPE_CHECKING:
+    from collections import abc
+
+
+SESSION_EXPORTS = 50  #: Default number of binaries exported by a session before it is recycled
+CLOSE_TIMEOUT = 10  #: Time (in seconds) given to a session to exit before it is killed
+
+
+class IDASession:
+    """
+    Long-lived IDA process exporting binaries on request, with the protocol described
+    in :py:mod:`binexport.ida_worker`.
+    """
+
+    def __init__(self, command: abc.Sequence[str], env: dict[str, str] | None = None):
+        """
+        :param command: command starting the session
+        :param env: environment of the session
+        """
+        self.exports = 0  #: number of binaries exported by the session
+        self._exited = False  # the session stopped answering
+
+        self._process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            text=True,
+            bufsize=1,
+            start_new_session=True,  # to kill the process group on timeout
+        )
+        self._responses: queue.Queue[dict | None] = queue.Queue()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        """
+        Read the responses of the session (until it exits).
+        """
+        for line in self._process.stdout:
+            if line.startswith(RESPONSE_PREFIX):
+                self._responses.put(json.loads(line[len(RESPONSE_PREFIX) :]))
+        self._responses.put(None)
+
+    @property
+    def alive(self) -> bool:
+        """
+        Whether the session process is running.
+        """
+        return not self._exited and self._process.poll() is None
+
+    def export(self, binary: Path | str, output: Path | str, timeout: float | None = None) -> bool:
+        """
+        Export a binary.
+
+        :param binary: binary path
+        :param output: BinExport file path
+        :param timeout: time (in seconds) to wait for the export, None to wait indefinitely
+        :raise TimeoutError: if the export lasts longer than the timeout (the session is killed)
+        :return: whether the export succeeded (False if the session crashed)
+        """
+        request = {"binary": str(Path(binary).absolute()), "output": str(Path(output).absolute())}
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+        except OSError:
+            self._exited = True
+            logger.error(f"IDA session exited before exporting {binary}")
+            return False
+
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            self.kill()
+            raise TimeoutError(f"Export of {binary} timed out after {timeout}s")
+        if response is None:
+            self._exited = True
+            logger.error(f"IDA session crashed while exporting {binary}")
+            return False
+
+        self.exports += 1
+        if not response["success"]:
+            logger.warning(f"{Path(binary).name} failed to export: {response['error']}")
+        return response["success"] and Path(output).exists()
+
+    def close(self) -> None:
+        """
+        Stop the session once its current export is done (killed if it does not exit).
+        """
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(CLOSE_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+    def kill(self) -> None:
+        """
+        Kill the session and the processes it launched.
+        """
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self._process.pid, signal.SIGKILL)
+            else:
+                self._process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        self._process.wait()
+
+
+class IDAWorkerPool:
+    """
+    Pool of long-lived IDA sessions, saving the IDA startup (licence check, plugin loading)
+    for each binary exported. Sessions are started on demand, up to the number of workers,
+    and are recycled after having exported a given number of binaries, after a crash or a
+    timeout. It can be used concurrently by several threads, and with
+    :py:meth:`ProgramBinExport.from_binary_file`.
+
+    By default sessions run :py:mod:`binexport.ida_worker`, which requires idalib (IDA Pro 9).
+    The IDA installation is given by the IDADIR or IDA_PATH environment variable.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_exports: int = SESSION_EXPORTS,
+        command: abc.Sequence[str] | None = None,
+        timeout: float | None = None,
+    ):
+        """
+        :param workers: maximum number of sessions running at the same time
+        :param max_exports: number of binaries exported by a session before it is recycled
+        :param command: command starting a session (default: the idalib worker)
+        :param timeout: default timeout of an export (in seconds), None for no timeout
+        """
+        self.max_exports = max_exports
+        self.command = list(command or [sys.executable, "-m", "binexport.ida_worker"])
+        self.timeout = timeout
+
+        self._env = dict(os.environ)
+        if "IDA_PATH" in self._env:
+            self._env.setdefault("IDADIR", self._env["IDA_PATH"])
+
+        # Slots of the sessions (None when not started), taken by the exports
+        self._slots: queue.Queue[IDASession | None] = queue.Queue()
+        for _ in range(max(1, workers)):
+            self._slots.put(None)
+        self._sessions: set[IDASession] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> IDAWorkerPool:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def _start_session(self) -> IDASession:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The IDA worker pool is closed")
+            session = IDASession(self.command, self._env)
+            self._sessions.add(session)
+        return session
+
+    def _stop_session(self, session: IDASession, kill: bool = False) -> None:
+        with self._lock:
+            self._sessions.discard(session)
+        if kill:
+            session.kill()
+        else:
+            session.close()
+
+    def export(self, binary: Path | str, output: Path | str, timeout: float | None = None) -> bool:
+        """
+        Export a binary with one of the sessions, waiting for one to be available.
+
+        :param binary: binary path
+        :param output: BinExport file path
+        :param timeout: timeout of the export (in seconds), None for the timeout of the pool
+        :raise TimeoutError: if the export lasts longer than the timeout
+        :return: whether the export succeeded
+        """
+        session = self._slots.get()
+        try:
+            if session is None or not session.alive:
+                session = self._start_session()
+            success = session.export(binary, output, self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            self._stop_session(session, kill=True)
+            session = None
+            raise
+        finally:
+            if session is not None and (not session.alive or session.exports >= self.max_exports):
+                # Recycle the session after a crash or once it exported enough binaries
+                self._stop_session(session, kill=not session.alive)
+                session = None
+            self._slots.put(session)
+        return success
+
+    def close(self) -> None:
+        """
+        Stop the sessions once their current export is done.
+        """
+        with self._lock:
+            self._closed = True
+            sessions = list(self._sessions)
+        for session in sessions:
+            self._stop_session(session)
+
+    def terminate(self) -> None:
+        """
+        Kill the sessions, interrupting their current export.
+        """
+        with self._lock:
+            self._closed = True
+            sessions = list(self._sessions)
+        for session in sessions:
+            self._stop_session(session, kill=True)
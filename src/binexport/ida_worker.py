@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# coding: utf-8
+"""
+Long-lived IDA session exporting binaries on request, see :py:class:`binexport.ida_pool.IDAWorkerPool`.
+
+It is run as ``python -m binexport.ida_worker`` and requires idalib (the ``idapro`` module of
+IDA Pro 9) with the BinExport plugin installed. Requests are read on the standard input, one
+JSON object per line ``{"binary": <path>, "output": <path>}``, and each of them is answered on
+the standard output by a line starting with :py:data:`RESPONSE_PREFIX` followed by the JSON
+object ``{"binary": <path>, "success": <bool>, "error": <str|null>}``. Other lines written on
+the standard output (e.g. IDA messages) are ignored by the pool. The session stops at the end
+of the standard input.
+"""
+
+from __future__ import annotations
+import sys
+import json
+
+RESPONSE_PREFIX = "@binexport-worker "  #: Prefix of the response lines
+
+
+def _idc_string(value: str) -> str:
+    """
+    Quote a string as an IDC literal.
+    """
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def export_binary(binary: str, output: str) -> str | None:
+    """
+    Export a binary with the BinExport plugin of the current IDA session.
+
+    :param binary: binary path
+    :param output: BinExport file path
+    :return: the error message, None on success
+    """
+    import idapro
+    import ida_auto
+    import ida_expr
+    import ida_idaapi
+
+    if idapro.open_database(binary, True) != 0:
+        return f"cannot open {binary}"
+    try:
+        ida_auto.auto_wait()
+        result = ida_expr.idc_value_t()
+        error = ida_expr.eval_idc_expr(
+            result, ida_idaapi.BADADDR, f"BinExportBinary({_idc_string(output)})"
+        )
+        if error:
+            return error
+    finally:
+        idapro.close_database(False)
+    return None
+
+
+def main() -> None:
+    """
+    Serve the export requests until the end of the standard input.
+    """
+    # idalib must be imported first, the licence check and plugin loading are done once here
+    import idapro  # noqa: F401
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        try:
+            error = export_binary(request["binary"], request["output"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        response = {"binary": request["binary"], "success": error is None, "error": error}
+        sys.stdout.write(RESPONSE_PREFIX + json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
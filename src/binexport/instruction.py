@@ -1,11 +1,10 @@
 from __future__ import annotations
-import weakref
-from functools import cached_property
 from typing import TYPE_CHECKING
 
 from binexport.operand import OperandBinExport
 
 if TYPE_CHECKING:
+    from .context import Context
     from .program import ProgramBinExport
     from .function import FunctionBinExport
     from .binexport2_pb2 import BinExport2
@@ -17,41 +16,46 @@ class InstructionBinExport:
     Instruction class. It represents an instruction with its operands.
     """
 
-    def __init__(
-        self,
-        program: weakref.ref[ProgramBinExport],
-        function: weakref.ref[FunctionBinExport],
-        addr: Addr,
-        i_idx: int,
-    ):
+    __slots__ = ("addr", "_ctx", "_idx", "_operands")
+
+    def __init__(self, context: Context, addr: Addr, i_idx: int):
         """
-        :param program: Weak reference to the program
-        :param function: Weak reference to the function
+        :param context: context shared by the objects of the function
         :param addr: address of the instruction (computed outside)
         :param i_idx: instruction index in the protobuf data structure
         """
         self.addr: Addr = addr  #: instruction address
-        self._program = program
-        self._function = function
+        self._ctx = context
         self._idx = i_idx
-        self.data_refs: set[Addr] = self.program.data_refs[self._idx]  #: Data references address
-        self.bytes = self.pb_instr.raw_bytes  #: bytes of the instruction (opcodes)
+        self._operands = None
 
     def __hash__(self) -> int:
         return hash(self.addr)
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, InstructionBinExport):
+            return NotImplemented
+        return self._idx == other._idx and self._ctx.program is other._ctx.program
+
     def __str__(self) -> str:
-        return "%s %s" % (self.mnemonic, ", ".join(str(o) for o in self.operands))
+        return self.program.instruction_string(self._idx)
 
     def __repr__(self) -> str:
-        return f"<{type(self).__name__} {self.addr:#08x}: {self.mnemonic} {', '.join(str(x) for x in self.operands)}>"
+        return f"<{type(self).__name__} {self.addr:#08x}: {self}>"
 
     @property
     def program(self) -> ProgramBinExport:
         """
         Program associated with this instruction.
         """
-        return self._program()
+        return self._ctx.program
+
+    @property
+    def function(self) -> FunctionBinExport:
+        """
+        Function associated with this instruction.
+        """
+        return self._ctx.function
 
     @property
     def pb_instr(self) -> BinExport2.Instruction:
@@ -60,6 +64,31 @@ class InstructionBinExport:
         """
         return self.program.proto.instruction[self._idx]
 
+    @property
+    def data_refs(self) -> set[Addr]:
+        """
+        Data references address
+        """
+        return set(self.program.data_refs[self._idx])
+
+    @property
+    def comments(self) -> list[str]:
+        """
+        Comments of the instruction
+        """
+        pb = self.program.proto
+        return [
+            pb.string_table[pb.comment[idx].string_table_index]
+            for idx in self.program.comments[self._idx]
+        ]
+
+    @property
+    def bytes(self) -> bytes:
+        """
+        Bytes of the instruction (opcodes)
+        """
+        return self.pb_instr.raw_bytes
+
     @property
     def mnemonic(self) -> str:
         """
@@ -67,7 +96,7 @@ class InstructionBinExport:
         """
         return self.program.proto.mnemonic[self.pb_instr.mnemonic_index].name
 
-    @cached_property
+    @property
     def operands(self) -> list[OperandBinExport]:
         """
         Returns a list of the operands instanciated dynamically on-demand.
@@ -76,7 +105,12 @@ class InstructionBinExport:
         :return: list of operands
         """
 
-        return [
-            OperandBinExport(self._program, self._function, weakref.ref(self), op_idx)
-            for op_idx in self.pb_instr.operand_index
-        ]
+        if self._operands is None:
+            self._operands = [
+                OperandBinExport(self._ctx, self, op_idx) for op_idx in self.pb_instr.operand_index
+            ]
+        return self._operands
+
+    @operands.deleter
+    def operands(self) -> None:
+        self._operands = None
@@ -0,0 +1,230 @@
+from __future__ import annotations
+import enum
+import time
+import hashlib
+import pathlib
+import sqlite3
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections import abc
+    from binexport.types import DisassemblerBackend
+
+
+HASH_CHUNK_SIZE = 1 << 20  #: Size of the reads when hashing a file
+
+
+def sha256_file(path: pathlib.Path | str) -> str:
+    """
+    SHA-256 of a file content.
+
+    :param path: file path
+    :return: hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExportStatus(enum.Enum):
+    """
+    Status of the export of a binary recorded in the manifest.
+    """
+
+    STARTED = "started"  #: export started but not finished (e.g. the run crashed)
+    SUCCESS = "success"  #: BinExport file generated
+    FAILURE = "failure"  #: the export failed
+    TIMEOUT = "timeout"  #: the export was killed on timeout
+
+
+class ManifestEntry(NamedTuple):
+    """
+    Export of a binary content (identified by its SHA-256) with a backend.
+    """
+
+    sha256: str  #: SHA-256 of the binary
+    backend: str  #: name of the backend used
+    path: str  #: path of the binary exported
+    output: str  #: path of the BinExport file
+    status: ExportStatus  #: status of the export
+    duration: float | None  #: duration of the export (in seconds)
+    timestamp: float  #: time of the last update
+
+
+class ExportManifest:
+    """
+    Record of the exports done by ``binexporter``, stored in a SQLite database.
+    Exports are keyed by the SHA-256 of the binary and the backend, so that unchanged
+    binaries and duplicated copies are not exported again, while each binary path
+    is associated to the content it had when exported. Entries are committed as soon
+    as they are updated: exports left started by a crashed run are simply redone.
+    """
+
+    FILENAME = "binexporter.sqlite"  #: Default name of the manifest
+
+    def __init__(self, path: pathlib.Path | str):
+        """
+        :param path: manifest file path, or directory where to store it (created if needed)
+        """
+        path = pathlib.Path(path)
+        if path.is_dir():
+            path = path / self.FILENAME
+        self.path: pathlib.Path = path  #: manifest file path
+
+        self._db = sqlite3.connect(path)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS exports ("
+                "sha256 TEXT, backend TEXT, path TEXT, output TEXT, status TEXT, "
+                "duration REAL, timestamp REAL, PRIMARY KEY (sha256, backend))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT, backend TEXT, sha256 TEXT, output TEXT, timestamp REAL, "
+                "PRIMARY KEY (path, backend))"
+            )
+
+    def __enter__(self) -> ExportManifest:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the manifest database.
+        """
+        self._db.close()
+
+    def lookup(self, sha256: str, backend: DisassemblerBackend) -> ManifestEntry | None:
+        """
+        Get the export of a binary content.
+
+        :param sha256: SHA-256 of the binary
+        :param backend: backend used
+        :return: the manifest entry, None if never exported
+        """
+        row = self._db.execute(
+            "SELECT sha256, backend, path, output, status, duration, timestamp FROM exports "
+            "WHERE sha256 = ? AND backend = ?",
+            (sha256, backend.name),
+        ).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(*row[:4], ExportStatus(row[4]), *row[5:])
+
+    def file_hash(self, path: pathlib.Path | str, backend: DisassemblerBackend) -> str | None:
+        """
+        SHA-256 of a binary when it was last exported (or linked).
+
+        :param path: binary path
+        :param backend: backend used
+        :return: the SHA-256, None if the binary is not in the manifest
+        """
+        row = self._db.execute(
+            "SELECT sha256 FROM files WHERE path = ? AND backend = ?",
+            (str(path), backend.name),
+        ).fetchone()
+        return row[0] if row else None
+
+    def start(
+        self,
+        sha256: str,
+        backend: DisassemblerBackend,
+        path: pathlib.Path | str,
+        output: pathlib.Path | str,
+    ) -> None:
+        """
+        Record the start of the export of a binary.
+
+        :param sha256: SHA-256 of the binary
+        :param backend: backend used
+        :param path: binary path
+        :param output: BinExport file path
+        """
+        self._update(sha256, backend, path, output, ExportStatus.STARTED, None)
+
+    def finish(
+        self,
+        sha256: str,
+        backend: DisassemblerBackend,
+        path: pathlib.Path | str,
+        output: pathlib.Path | str,
+        success: bool,
+        duration: float | None,
+        timed_out: bool = False,
+    ) -> None:
+        """
+        Record the result of the export of a binary.
+
+        :param sha256: SHA-256 of the binary
+        :param backend: backend used
+        :param path: binary path
+        :param output: BinExport file path
+        :param success: whether the export succeeded
+        :param duration: duration of the export (in seconds)
+        :param timed_out: whether the export was killed on timeout
+        """
+        if success:
+            status = ExportStatus.SUCCESS
+        else:
+            status = ExportStatus.TIMEOUT if timed_out else ExportStatus.FAILURE
+        self._update(sha256, backend, path, output, status, duration)
+        if success:
+            self.add_file(path, sha256, backend, output)
+
+    def add_file(
+        self,
+        path: pathlib.Path | str,
+        sha256: str,
+        backend: DisassemblerBackend,
+        output: pathlib.Path | str,
+    ) -> None:
+        """
+        Record the BinExport file of a binary path (e.g. a duplicated copy linked
+        to the export of the same content).
+
+        :param path: binary path
+        :param sha256: SHA-256 of the binary
+        :param backend: backend used
+        :param output: BinExport file path
+        """
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (str(path), backend.name, sha256, str(output), time.time()),
+            )
+
+    def entries(self) -> abc.Iterator[ManifestEntry]:
+        """
+        Iterates over all the exports recorded.
+        """
+        for row in self._db.execute(
+            "SELECT sha256, backend, path, output, status, duration, timestamp FROM exports"
+        ):
+            yield ManifestEntry(*row[:4], ExportStatus(row[4]), *row[5:])
+
+    def _update(
+        self,
+        sha256: str,
+        backend: DisassemblerBackend,
+        path: pathlib.Path | str,
+        output: pathlib.Path | str,
+        status: ExportStatus,
+        duration: float | None,
+    ) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO exports VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    sha256,
+                    backend.name,
+                    str(path),
+                    str(output),
+                    status.value,
+                    duration,
+                    time.time(),
+                ),
+            )
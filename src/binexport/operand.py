@@ -1,87 +1,84 @@
 from __future__ import annotations
-from functools import cached_property
 from typing import TYPE_CHECKING
 
 from binexport.expression import ExpressionBinExport
 from binexport.types import ExpressionType
 
 if TYPE_CHECKING:
-    import weakref
+    from .context import Context
     from .program import ProgramBinExport
     from .function import FunctionBinExport
     from .instruction import InstructionBinExport
     from .binexport2_pb2 import BinExport2
 
 
+def render_expressions(expressions: list[ExpressionBinExport]) -> str:
+    """
+    Render the expression tree of an operand (in-order).
+
+    :param expressions: expressions of the operand in pre-order
+    :return: string of the operand
+    """
+
+    inv = {"{": "}", "[": "]", "!": ""}
+    children = {expr: [] for expr in expressions}
+    root = None
+    for expr in expressions:
+        if expr.parent is not None:
+            children[expr.parent].append(expr)
+        else:
+            root = expr
+
+    def render(expr: ExpressionBinExport) -> str:
+        if len(children[expr]) == 2:  # Binary operator
+            left, right = children[expr]
+            return f"{render(left)}{expr.value}{render(right)}"
+
+        final_s = ""
+        if expr.type != ExpressionType.SIZE:  # Ignore SIZE
+            if isinstance(expr.value, int):
+                final_s += hex(expr.value)
+            else:
+                final_s += str(expr.value)
+
+        final_s += ",".join(render(child) for child in children[expr])
+
+        if expr.type == ExpressionType.SYMBOL and expr.value in inv:
+            final_s += inv[expr.value]
+
+        return final_s
+
+    return render(root) if root is not None else ""
+
+
 class OperandBinExport:
     """
     Operand object.
     Provide access to the underlying expression.
     """
 
-    def __init__(
-        self,
-        program: weakref.ref[ProgramBinExport],
-        function: weakref.ref[FunctionBinExport],
-        instruction: weakref.ref[InstructionBinExport],
-        op_idx: int,
-    ):
+    __slots__ = ("_ctx", "_inst_addr", "_inst_idx", "_idx", "_expressions")
+
+    def __init__(self, context: Context, instruction: InstructionBinExport, op_idx: int):
         """
-        :param program: Weak reference to the program
-        :param function: Weak reference to the function
-        :param instruction: Weak reference to the instruction
+        :param context: context shared by the objects of the function
+        :param instruction: instruction of the operand (only its address and index are kept)
         :param op_idx: operand index in protobuf structure
         """
-        self._program = program
-        self._function = function
-        self._instruction = instruction
+        self._ctx = context
+        self._inst_addr = instruction.addr
+        self._inst_idx = instruction._idx
         self._idx = op_idx
+        self._expressions = None
 
     def __str__(self) -> str:
         """
-        Formatted string of the operand (shown in-order)
+        Formatted string of the operand (shown in-order).
+        The string is computed once per operand of the program and shared.
 
         :return: string of the operand
         """
-
-        class Tree:
-            def __init__(self, expr: ExpressionBinExport):
-                self.children = []
-                self.expr = expr
-
-            def __str__(self) -> str:
-                if len(self.children) == 2:  # Binary operator
-                    left = str(self.children[0])
-                    right = str(self.children[1])
-                    return f"{left}{self.expr.value}{right}"
-
-                inv = {"{": "}", "[": "]", "!": ""}
-                final_s = ""
-
-                if self.expr.type != ExpressionType.SIZE:  # Ignore SIZE
-                    if isinstance(self.expr.value, int):
-                        final_s += hex(self.expr.value)
-                    else:
-                        final_s += str(self.expr.value)
-
-                final_s += ",".join(str(child) for child in self.children)
-
-                if self.expr.type == ExpressionType.SYMBOL and self.expr.value in inv:
-                    final_s += inv[self.expr.value]
-
-                return final_s
-
-        tree = {}
-        for expr in self.expressions:
-            tree[expr] = Tree(expr)
-            if expr.parent:
-                tree[expr.parent].children.append(tree[expr])
-            else:
-                root = expr
-        if tree:
-            return str(tree[root])
-        else:
-            return ""
+        return self.program.operand_string(self._idx)
 
     def __repr__(self) -> str:
         return f"<{type(self).__name__} {str(self)}>"
@@ -91,7 +88,7 @@ class OperandBinExport:
         """
         Program object associated to this operand.
         """
-        return self._program()
+        return self._ctx.program
 
     @property
     def function(self) -> FunctionBinExport:
@@ -99,14 +96,18 @@ class OperandBinExport:
         Function object associated to this operand.
         """
 
-        return self._function()
+        return self._ctx.function
 
     @property
     def instruction(self) -> InstructionBinExport:
         """
         Instruction object associated to this operand.
+        The operand does not keep a reference on its instruction, thus the object
+        returned is a new instruction object (equal to the original one).
         """
-        return self._instruction()
+        from binexport.instruction import InstructionBinExport
+
+        return InstructionBinExport(self._ctx, self._inst_addr, self._inst_idx)
 
     @property
     def pb_operand(self) -> BinExport2.Operand:
@@ -115,7 +116,7 @@ class OperandBinExport:
         """
         return self.program.proto.operand[self._idx]
 
-    @cached_property
+    @property
     def expressions(self) -> list[ExpressionBinExport]:
         """
         Iterates over all the operand expression in a pre-order manner
@@ -125,12 +126,16 @@ class OperandBinExport:
         :return: list of expressions
         """
 
-        expr_dict = {}  # {expression protobuf idx : ExpressionBinExport}
-        for exp_idx in self.pb_operand.expression_index:
-            parent = None
-            if self.program.proto.expression[exp_idx].HasField("parent_index"):
-                parent = expr_dict[self.program.proto.expression[exp_idx].parent_index]
-            expr_dict[exp_idx] = ExpressionBinExport(
-                self.program, self.function, self.instruction, exp_idx, parent
-            )
-        return list(expr_dict.values())
+        if self._expressions is None:
+            program = self.program
+            instruction = self.instruction
+            function = self.function
+            self._expressions = [
+                program.expression(exp_idx).bind(instruction, function)
+                for exp_idx in self.pb_operand.expression_index
+            ]
+        return self._expressions
+
+    @expressions.deleter
+    def expressions(self) -> None:
+        self._expressions = None
@@ -0,0 +1,237 @@
+from __future__ import annotations
+import os
+import time
+import queue
+import pathlib
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from binexport.program import ProgramBinExport
+from binexport.utils import logger, mp_context
+
+if TYPE_CHECKING:
+    from collections import abc
+
+
+PREFETCH_CHUNK_SIZE = 1 << 20  #: Size of the reads of the prefetch thread
+
+
+class ProgramResult(NamedTuple):
+    """
+    Result of the processing of a BinExport file by :py:func:`map_programs`
+    or :py:func:`load_many`.
+    """
+
+    path: pathlib.Path  #: BinExport file path
+    result: Any  #: value returned by the function (or the program for `load_many`)
+    error: str | None  #: formatted exception if the file failed, None otherwise
+    read_time: float  #: time spent reading the file ahead (in seconds)
+    parse_time: float  #: time spent opening the program (in seconds)
+    run_time: float  #: time spent in the function (in seconds)
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether the file has been successfully processed
+        """
+        return self.error is None
+
+
+def _read_ahead(path: pathlib.Path, buffer: bytearray) -> None:
+    """
+    Read a whole file (and drop its content) so that it is in the page cache when
+    opened by a worker.
+    """
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        while f.readinto(buffer):
+            pass
+
+
+def _prefetch(
+    paths: abc.Iterable[pathlib.Path | str], out: queue.Queue, stop: threading.Event
+) -> None:
+    """
+    Prefetch thread: read the files ahead and push (path, read time, error) in the queue,
+    then a final None. The queue size bounds the number of files read ahead.
+    """
+    buffer = bytearray(PREFETCH_CHUNK_SIZE)
+    try:
+        for path in paths:
+            if stop.is_set():
+                return
+            path = pathlib.Path(path)
+            start = time.perf_counter()
+            error = None
+            try:
+                _read_ahead(path, buffer)
+            except OSError:
+                logger.warning(f"{path} can't be read")
+                error = traceback.format_exc()
+            _put(out, (path, time.perf_counter() - start, error), stop)
+    finally:
+        _put(out, None, stop)
+
+
+def _put(out: queue.Queue, item: Any, stop: threading.Event) -> None:
+    """
+    Put an item in the queue, giving up if the consumer stopped in the meantime.
+    """
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def _prefetched(
+    paths: abc.Iterable[pathlib.Path | str], prefetch: int
+) -> tuple[queue.Queue, threading.Event, threading.Thread]:
+    """
+    Start the prefetch thread of the given files.
+
+    :return: the queue of prefetched files, the event stopping the thread and the thread
+    """
+    out = queue.Queue(maxsize=max(prefetch, 1))
+    stop = threading.Event()
+    thread = threading.Thread(target=_prefetch, args=(paths, out, stop), daemon=True)
+    thread.start()
+    return out, stop, thread
+
+
+def _process(
+    func: abc.Callable[[ProgramBinExport], Any] | None,
+    path: pathlib.Path,
+    program_kwargs: dict[str, Any],
+) -> tuple[Any, str | None, float, float]:
+    """
+    Worker function: open the program and apply the function on it.
+
+    :return: result, error, parse time and run time
+    """
+    start = time.perf_counter()
+    parse_time = 0.0
+    try:
+        program = ProgramBinExport(path, **program_kwargs)
+        parse_time = time.perf_counter() - start
+        result = func(program) if func is not None else program
+        return result, None, parse_time, time.perf_counter() - start - parse_time
+    except Exception:
+        if not parse_time:
+            parse_time = time.perf_counter() - start
+        return None, traceback.format_exc(), parse_time, time.perf_counter() - start - parse_time
+
+
+def map_programs(
+    func: abc.Callable[[ProgramBinExport], Any],
+    paths: abc.Iterable[pathlib.Path | str],
+    *,
+    workers: int | None = None,
+    max_in_flight: int | None = None,
+    prefetch: int = 2,
+    **program_kwargs,
+) -> abc.Iterator[ProgramResult]:
+    """
+    Apply a function on the programs of many BinExport files, over a process pool
+    (whose workers are not forked, see :py:data:`binexport.utils.mp_context`).
+    Each worker opens the program and calls the function on it, only the value returned
+    is sent back (it must thus be picklable, as the function itself). Meanwhile a
+    prefetch thread reads the next files so that workers find them in the page cache.
+    Results are yielded in completion order; a failing file does not stop the others,
+    its result has the error set.
+
+    .. code-block:: python
+
+        def count_functions(program: ProgramBinExport) -> int:
+            return len(program)
+
+        for res in map_programs(count_functions, paths, workers=8, lazy=True):
+            print(res.path, res.result if res.ok else res.error)
+
+    :param func: function called on each program
+    :param paths: BinExport files paths
+    :param workers: number of worker processes (by default the number of CPUs)
+    :param max_in_flight: maximum number of files submitted to the pool and not yet
+                          completed (by default twice the number of workers)
+    :param prefetch: number of files read ahead of the submission
+    :param program_kwargs: arguments given to :py:class:`ProgramBinExport` (e.g. `lazy`)
+    :return: iterator over the results
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+
+    files, stop, thread = _prefetched(paths, prefetch)
+    pending: dict[Future, tuple[pathlib.Path, float]] = {}
+    exhausted = False
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+    try:
+        while not exhausted or pending:
+            # Submit the prefetched files, only block on the queue when nothing is running
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    item = files.get(block=not pending)
+                except queue.Empty:
+                    break
+                if item is None:
+                    exhausted = True
+                    break
+                path, read_time, error = item
+                if error is not None:
+                    yield ProgramResult(path, None, error, read_time, 0.0, 0.0)
+                    continue
+                future = executor.submit(_process, func, path, program_kwargs)
+                pending[future] = (path, read_time)
+
+            if not pending:
+                continue
+
+            # Wake up regularly to submit newly prefetched files, unless the pool is full
+            full = exhausted or len(pending) >= max_in_flight
+            done, _ = wait(pending, timeout=None if full else 0.05, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, read_time = pending.pop(future)
+                try:
+                    result, error, parse_time, run_time = future.result()
+                except Exception:  # e.g. the result is not picklable or a worker died
+                    result, error, parse_time, run_time = None, traceback.format_exc(), 0.0, 0.0
+                if error is not None:
+                    logger.warning(f"{path} failed to be processed")
+                yield ProgramResult(path, result, error, read_time, parse_time, run_time)
+    finally:
+        stop.set()
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+        thread.join()
+
+
+def load_many(
+    paths: abc.Iterable[pathlib.Path | str], *, prefetch: int = 2, **program_kwargs
+) -> abc.Iterator[ProgramResult]:
+    """
+    Open the programs of many BinExport files, while a prefetch thread reads the
+    next files. Programs are yielded in the files order as the result of each
+    :py:class:`ProgramResult`. To process many files in parallel prefer
+    :py:func:`map_programs`, which only sends back the result of the processing.
+
+    :param paths: BinExport files paths
+    :param prefetch: number of files read ahead
+    :param program_kwargs: arguments given to :py:class:`ProgramBinExport` (e.g. `lazy`)
+    :return: iterator over the results
+    """
+    files, stop, thread = _prefetched(paths, prefetch)
+    try:
+        while (item := files.get()) is not None:
+            path, read_time, error = item
+            if error is not None:
+                yield ProgramResult(path, None, error, read_time, 0.0, 0.0)
+                continue
+            program, error, parse_time, _ = _process(None, path, program_kwargs)
+            yield ProgramResult(path, program, error, read_time, parse_time, 0.0)
+    finally:
+        stop.set()
+        thread.join()
@@ -1,23 +1,79 @@
 from __future__ import annotations
 import os
+import json
 import pathlib
+import array
 import networkx
 import weakref
+from functools import cached_property
+from itertools import accumulate
 from textwrap import dedent
-from collections import defaultdict
+from collections.abc import Mapping
 from tempfile import TemporaryDirectory
 from subprocess import run, PIPE, DEVNULL
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
+from binexport.address_index import AddressIndex
 from binexport.binexport2_pb2 import BinExport2
+from binexport.block_cache import BlockCache
+from binexport.context import Context
+from binexport.derived import IndexInfo, derived_index
+from binexport.expression import ExpressionBinExport
+from binexport.features import FeatureMatrix, compute_feature_matrix
 from binexport.function import FunctionBinExport
-from binexport.types import FunctionType, DisassemblerBackend
-from binexport.utils import logger
+from binexport.graph import CSRGraph
+from binexport.operand import render_expressions
+from binexport.types import FunctionType, DisassemblerBackend, XrefType
+from binexport.sidecar import SidecarCache
+from binexport.string_index import StringIndex
+from binexport.shared import (
+    SharedProgram,
+    reduce_program,
+    register_program,
+    release_shared_memory,
+    share_program,
+)
+from binexport.tables import InstructionTable
+from binexport.utils import logger, compute_instruction_addresses, instruction_index_range
+from binexport.wire import LazyMessage
+from binexport.xrefs import RefTable, Xref
 
 if TYPE_CHECKING:
+    from collections import abc
+    from binexport.ida_pool import IDAWorkerPool
     from binexport.types import Addr
 
 
+GHIDRA_BATCH_SIZE = 64  #: Maximum number of programs exported by a Ghidra headless session
+
+
+class FunctionNames(Mapping):
+    """
+    Read-only mapping of function names to functions. Functions
+    are instantiated by the program only when looked up.
+    """
+
+    def __init__(self, program: ProgramBinExport, names: dict[str, Addr]):
+        """
+        :param program: program holding the functions
+        :param names: dictionary function name -> function address
+        """
+        self._program = weakref.ref(program)
+        self._names = names
+
+    def __getitem__(self, name: str) -> FunctionBinExport:
+        return self._program()[self._names[name]]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def __iter__(self) -> abc.Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
 class ProgramBinExport(dict):
     """
     Program class that wraps the binexport with high-level functions
@@ -25,94 +81,445 @@ class ProgramBinExport(dict):
     reference all functions based on their address.
     """
 
-    def __init__(self, file: pathlib.Path | str):
+    def __init__(
+        self,
+        file: pathlib.Path | str,
+        lazy: bool = False,
+        cache: bool = False,
+        fields: abc.Iterable[str] | None = None,
+        *,
+        buffer: bytes | memoryview | None = None,
+    ):
         """
         :param file: BinExport file path
+        :param lazy: if True, functions, references maps and the call graph are
+                     only built on first access. Otherwise everything is loaded
+                     in the constructor.
+        :param cache: if True, use the on-disk cache stored next to the BinExport file
+                      (created if missing or outdated). When the cache is valid the
+                      protobuf is only parsed when its content is accessed, which
+                      makes reopening a program in lazy mode almost free.
+        :param fields: if set, only these top-level protobuf fields (e.g. ``meta_information``,
+                       ``call_graph``, ``string_table``) are decoded when the file is parsed.
+                       The other ones are skipped and decoded from the file when first
+                       accessed. Meant to be used in lazy mode, as loading the program
+                       touches most of the fields.
+        :param buffer: content of the BinExport file if already in memory. The file is then
+                       not read and the buffer is only kept until the protobuf is parsed
+                       (``fields`` is ignored).
         """
         super(ProgramBinExport, self).__init__()
 
-        self._pb = BinExport2()
+        self._pb = None  # Parsed on first access
+        self._buffer = buffer  # Content of the BinExport file, if given
+        self._token = None  # Identifier of the program when pickled, see binexport.shared
+        self._shared = None  # Handle of the program in shared memory, see ProgramBinExport.share
+        self._shm = None  # Shared memory block owned by the program
+        self._sidecar = None  # On-disk cache of the derived tables
+        self._fields = None if fields is None else tuple(fields)  # Fields decoded when parsing
+        self._context = Context(weakref.ref(self))  # Program-wide context of expressions
+        self._expressions = {}  # Interning table of expressions {index -> expression}
+        self._operand_strings = {}  # Rendered operands {index -> string}
+        self._index_stats = {}  # Build time and size of the derived indexes {name -> stats}
+        #: Cache of the functions basic blocks (disabled by default), see :py:class:`BlockCache`
+        self.block_cache: BlockCache = BlockCache()
 
         self.path: pathlib.Path = pathlib.Path(file)  #: Binexport file path
 
-        with open(file, "rb") as f:
-            self._pb.ParseFromString(f.read())
+        if cache:
+            self._sidecar = SidecarCache.open(self.path)
+            if self._sidecar is None:
+                self._sidecar = SidecarCache.create(self)
+
         self.mask = 0xFFFFFFFF if self.architecture.endswith("32") else 0xFFFFFFFFFFFFFFFF
-        self.fun_names: dict[str, FunctionBinExport] = {}  #: dictionary function name -> name
-        self.callgraph: networkx.DiGraph = networkx.DiGraph()  #: program callgraph (as Digraph)
 
-        # Make the data refs map {instruction index -> address referred}
-        # dictionary of instruction index to set of refs
-        self.data_refs: dict[int, set[Addr]] = defaultdict(set)
-        for entry in self.proto.data_reference:
-            self.data_refs[entry.instruction_index].add(entry.address)
+        if not lazy:
+            self.load()
 
-        # Make the address comment (deprecated)
-        self.addr_refs = {}
-        for entry in self.proto.address_comment[::-1]:
-            if entry.instruction_index in self.addr_refs:
-                self.addr_refs[entry.instruction_index].append(
-                    self.proto.string_table[entry.string_table_index]
-                )
-            else:
-                self.addr_refs[entry.instruction_index] = [
-                    self.proto.string_table[entry.string_table_index]
-                ]
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}:{self.name}>"
 
-        # Make the string reference
-        self.string_refs = {}
-        for entry in self.proto.string_reference:
-            self.string_refs[entry.instruction_index] = entry.string_table_index
+    def __missing__(self, addr: Addr) -> FunctionBinExport:
+        """
+        Instantiate the function at the given address if it is not yet loaded.
+
+        :param addr: function address
+        :return: the function object
+        """
+        if addr not in self._function_index:
+            raise KeyError(addr)
+        return self._load_function(addr)
+
+    def __contains__(self, addr: Addr) -> bool:
+        return addr in self._function_index or super(ProgramBinExport, self).__contains__(addr)
+
+    def __iter__(self) -> abc.Iterator[Addr]:
+        return iter(self._function_index)
+
+    def __len__(self) -> int:
+        return len(self._function_index)
+
+    def get(self, addr: Addr, default=None) -> FunctionBinExport | None:
+        return self[addr] if addr in self else default
+
+    def keys(self) -> abc.KeysView[Addr]:
+        return self._function_index.keys()
+
+    def values(self) -> abc.ValuesView[FunctionBinExport]:
+        self._load_functions()
+        return super(ProgramBinExport, self).values()
+
+    def items(self) -> abc.ItemsView[Addr, FunctionBinExport]:
+        self._load_functions()
+        return super(ProgramBinExport, self).items()
+
+    def load(self) -> None:
+        """
+        Load all the functions and the call graph. This is done by the constructor
+        unless the program is opened in lazy mode. The other derived indexes (references,
+        comments, ...) are built on first access, see :py:meth:`ProgramBinExport.index_info`.
+        """
+        self._load_functions()
+        _ = self.callgraph_csr, self.fun_names
+
+    @classmethod
+    def register_index(cls, name: str, func: abc.Callable[[ProgramBinExport], Any]) -> None:
+        """
+        Declare a new derived index of the programs, available as an attribute built on
+        first access (see :py:class:`derived_index`).
+
+        :param name: name of the index attribute
+        :param func: function computing the index from the program
+        """
+        index = derived_index(func)
+        setattr(cls, name, index)
+        index.__set_name__(cls, name)
+
+    def index_info(self) -> list[IndexInfo]:
+        """
+        Statistics of the derived indexes of the program: whether they are built, their
+        build time and size.
+
+        :return: list of the indexes statistics
+        """
+        return [
+            IndexInfo(name, name in self.__dict__, *self._index_stats.get(name, (None, None)))
+            for name in self._derived_indexes
+        ]
+
+    def drop_index(self, name: str) -> None:
+        """
+        Drop a derived index to release its memory, it is rebuilt on next access.
+
+        :param name: name of the index
+        """
+        if name not in self._derived_indexes:
+            raise KeyError(name)
+        self.__dict__.pop(name, None)
+        self._index_stats.pop(name, None)
+
+    def drop_indexes(self) -> None:
+        """
+        Drop all the derived indexes, see :py:meth:`ProgramBinExport.drop_index`.
+        """
+        for name in self._derived_indexes:
+            self.drop_index(name)
+
+    @cached_property
+    def _function_index(self) -> dict[Addr, int | None]:
+        """
+        Map of all the functions addresses to their FlowGraph index in the protobuf
+        (None for imported functions). It is built without instantiating any function.
+        """
+        if self._sidecar is not None:
+            index = dict(
+                zip(self._sidecar["function_address"], self._sidecar["function_flow_graph"])
+            )
+            index.update(dict.fromkeys(self._sidecar["import_address"]))
+            return index
 
+        index = {}
         count_f = 0
         coll = 0
-        # Load all the functions
         for i, pb_fun in enumerate(self.proto.flow_graph):
-            f = FunctionBinExport(weakref.ref(self), pb_fun=pb_fun)
-            if f.addr in self:
-                logger.error(f"Address collision for 0x{f.addr:x}")
+            addr = self._entry_address(pb_fun)
+            if addr in index:
+                logger.error(f"Address collision for 0x{addr:x}")
                 coll += 1
-            self[f.addr] = f
+            index[addr] = i
             count_f += 1
 
         count_imp = 0
-        # Load the callgraph
         cg = self.proto.call_graph
         for node in cg.vertex:
-            if node.address not in self and node.type == cg.Vertex.IMPORTED:
-                self[node.address] = FunctionBinExport(
-                    weakref.ref(self), is_import=True, addr=node.address
-                )
+            if node.address not in index and node.type == cg.Vertex.IMPORTED:
+                index[node.address] = None
                 count_imp += 1
-            if node.address not in self:
+            if node.address not in index:
                 logger.error(f"Missing function address: 0x{node.address:x} ({node.type})")
-                continue
-
-            self[node.address].type = FunctionType.from_proto(node.type)
-            if node.demangled_name:
-                self[node.address].name = node.demangled_name
-            elif node.mangled_name:
-                self[node.address].name = node.mangled_name
-
-        for edge in cg.edge:
-            src = cg.vertex[edge.source_vertex_index].address
-            dst = cg.vertex[edge.target_vertex_index].address
-            # Unsure that both src and dst exists (Sometimes SRE like Ghidra export function that doesn't exists)
-            if src in self and dst in self:
-                self.callgraph.add_edge(src, dst)
-                self[src].children.add(self[dst])
-                self[dst].parents.add(self[src])
-
-        # Create a map of function names for quick lookup later on
-        for f in self.values():
-            self.fun_names[f.name] = f
 
         logger.debug(
             f"total all:{count_f}, imported:{count_imp} collision:{coll} (total:{count_f + count_imp + coll})"
         )
+        return index
 
-    def __repr__(self) -> str:
-        return f"<{type(self).__name__}:{self.name}>"
+    @cached_property
+    def _vertex_index(self) -> dict[Addr, tuple[int, str | None]]:
+        """
+        Map of function addresses to their call graph vertex type and name
+        """
+        if self._sidecar is not None:
+            return dict(
+                zip(
+                    self._sidecar["vertex_address"],
+                    zip(self._sidecar["vertex_type"], self._sidecar.vertex_names),
+                )
+            )
+
+        vertices = {}
+        for node in self.proto.call_graph.vertex:
+            name = node.demangled_name or node.mangled_name or None
+            if node.address in vertices and name is None:
+                name = vertices[node.address][1]
+            vertices[node.address] = (node.type, name)
+        return vertices
+
+    def _entry_address(self, pb_fun: BinExport2.FlowGraph) -> Addr:
+        """
+        Address of the function entry point, avoiding to compute the whole
+        instruction address table when the entry instruction has an explicit address.
+        """
+        inst_idx = self.proto.basic_block[pb_fun.entry_basic_block_index].instruction_index[0]
+        inst = self.proto.instruction[inst_idx.begin_index]
+        if inst.HasField("address"):
+            return inst.address
+        return self.instruction_address(inst_idx.begin_index)
+
+    def _load_function(self, addr: Addr) -> FunctionBinExport:
+        """
+        Instantiate the function at the given address and register it in the program.
+
+        :param addr: function address
+        :return: the function object
+        """
+        fg_idx = self._function_index[addr]
+        if fg_idx is None:
+            f = FunctionBinExport(weakref.ref(self), is_import=True, addr=addr)
+        else:
+            f = FunctionBinExport(weakref.ref(self), pb_fun=self.proto.flow_graph[fg_idx])
+
+        if addr in self._vertex_index:
+            vtype, name = self._vertex_index[addr]
+            f.type = FunctionType.from_proto(vtype)
+            if name:
+                f.name = name
+
+        super(ProgramBinExport, self).__setitem__(addr, f)
+        return f
+
+    def _load_functions(self) -> None:
+        """
+        Instantiate all the functions not yet loaded.
+        """
+        if super(ProgramBinExport, self).__len__() == len(self._function_index):
+            return
+        for addr in self._function_index:
+            if not super(ProgramBinExport, self).__contains__(addr):
+                self._load_function(addr)
+
+    @derived_index
+    def callgraph_csr(self) -> CSRGraph:
+        """
+        The program call graph stored in compact arrays. Built on first access.
+        """
+        if self._sidecar is not None:
+            return CSRGraph(
+                [], zip(self._sidecar["call_edge_source"], self._sidecar["call_edge_target"])
+            )
+
+        cg = self.proto.call_graph
+        edges = (
+            (
+                cg.vertex[edge.source_vertex_index].address,
+                cg.vertex[edge.target_vertex_index].address,
+            )
+            for edge in cg.edge
+        )
+        # Unsure that both src and dst exists (Sometimes SRE like Ghidra export function that doesn't exists)
+        return CSRGraph([], ((src, dst) for src, dst in edges if src in self and dst in self))
+
+    @derived_index
+    def callgraph(self) -> networkx.DiGraph:
+        """
+        The program call graph (as Digraph). Built from :py:attr:`ProgramBinExport.callgraph_csr`
+        on first access.
+        """
+        return self.callgraph_csr.to_networkx()
+
+    @derived_index
+    def address_index(self) -> AddressIndex:
+        """
+        Index resolving any address to the instruction, basic blocks, functions and
+        section containing it, see :py:class:`AddressIndex`. Built on first access.
+        """
+        return AddressIndex(self)
+
+    @derived_index
+    def string_index(self) -> StringIndex:
+        """
+        Index of the string table resolving the strings to the instructions and functions
+        referencing them, and searching strings, see :py:class:`StringIndex`.
+        Built on first access.
+        """
+        return StringIndex(self)
+
+    @derived_index
+    def fun_names(self) -> FunctionNames:
+        """
+        Dictionary of function name -> function. Functions are only
+        instantiated when looked up.
+        """
+        names = {}
+        for addr, fg_idx in self._function_index.items():
+            vertex = self._vertex_index.get(addr)
+            if vertex is not None and vertex[1]:
+                names[vertex[1]] = addr
+            else:
+                names["sub_%X" % addr] = addr
+        return FunctionNames(self, names)
+
+    @derived_index
+    def data_refs(self) -> RefTable:
+        """
+        Data references table {instruction index -> addresses referred}. Instructions
+        without data reference map to an empty tuple.
+        """
+        if self._sidecar is not None:
+            return RefTable(
+                zip(self._sidecar["data_ref_instruction"], self._sidecar["data_ref_address"])
+            )
+        return RefTable(
+            (entry.instruction_index, entry.address) for entry in self.proto.data_reference
+        )
+
+    @derived_index
+    def code_refs(self) -> RefTable:
+        """
+        Code references table {instruction index -> call targets addresses}
+        """
+        return RefTable(
+            (inst_idx, target)
+            for inst_idx, inst in enumerate(self.proto.instruction)
+            for target in inst.call_target
+        )
+
+    @derived_index
+    def _string_ref_table(self) -> RefTable:
+        """
+        String references table {instruction index -> string table indices}, with all the
+        references of an instruction (unlike :py:attr:`ProgramBinExport.string_refs`)
+        """
+        if self._sidecar is not None:
+            return RefTable(
+                zip(self._sidecar["string_ref_instruction"], self._sidecar["string_ref_string"]),
+                value_typecode="I",
+            )
+        return RefTable(
+            (
+                (entry.instruction_index, entry.string_table_index)
+                for entry in self.proto.string_reference
+            ),
+            value_typecode="I",
+        )
+
+    def xrefs_from(self, inst_idx: int) -> list[Xref]:
+        """
+        Cross-references (data, string and code) from an instruction.
+
+        :param inst_idx: index of the instruction
+        :return: list of references
+        """
+        return [
+            Xref(xref_type, inst_idx, target)
+            for xref_type, table in (
+                (XrefType.DATA, self.data_refs),
+                (XrefType.STRING, self._string_ref_table),
+                (XrefType.CODE, self.code_refs),
+            )
+            for target in table[inst_idx]
+        ]
+
+    def xrefs_to(self, addr: Addr) -> list[Xref]:
+        """
+        Cross-references (data and code) to an address. The inverted tables are
+        built on first call.
+
+        :param addr: address referred
+        :return: list of references
+        """
+        return [
+            Xref(xref_type, inst_idx, addr)
+            for xref_type, table in (
+                (XrefType.DATA, self.data_refs),
+                (XrefType.CODE, self.code_refs),
+            )
+            for inst_idx in table.inverted()[addr]
+        ]
+
+    def string_xrefs_to(self, string_idx: int) -> list[Xref]:
+        """
+        Cross-references to a string of the string table. The inverted table is
+        built on first call.
+
+        :param string_idx: index of the string in the string table
+        :return: list of references
+        """
+        return [
+            Xref(XrefType.STRING, inst_idx, string_idx)
+            for inst_idx in self._string_ref_table.inverted()[string_idx]
+        ]
+
+    @derived_index
+    def comments(self) -> RefTable:
+        """
+        Comments table {instruction index -> comment indices in the protobuf}
+        """
+        return RefTable(
+            ((comment.instruction_index, i) for i, comment in enumerate(self.proto.comment)),
+            value_typecode="I",
+        )
+
+    @derived_index
+    def addr_refs(self) -> dict[int, list[str]]:
+        """
+        Address comments map {instruction index -> list of comments} (deprecated)
+        """
+        addr_refs = {}
+        for entry in self.proto.address_comment[::-1]:
+            if entry.instruction_index in addr_refs:
+                addr_refs[entry.instruction_index].append(
+                    self.proto.string_table[entry.string_table_index]
+                )
+            else:
+                addr_refs[entry.instruction_index] = [
+                    self.proto.string_table[entry.string_table_index]
+                ]
+        return addr_refs
+
+    @derived_index
+    def string_refs(self) -> dict[int, int]:
+        """
+        String references map {instruction index -> string table index}
+        """
+        if self._sidecar is not None:
+            return dict(
+                zip(self._sidecar["string_ref_instruction"], self._sidecar["string_ref_string"])
+            )
+
+        string_refs = {}
+        for entry in self.proto.string_reference:
+            string_refs[entry.instruction_index] = entry.string_table_index
+        return string_refs
 
     @staticmethod
     def from_binary_file(
@@ -121,18 +528,22 @@ class ProgramBinExport(dict):
         open_export: bool = True,
         override: bool = False,
         backend: DisassemblerBackend = DisassemblerBackend.IDA,
+        ida_pool: IDAWorkerPool | None = None,
     ) -> ProgramBinExport | bool:
         """
         Generate the .BinExport file for the given program and return an instance
         of ProgramBinExport.
 
-        .. warning:: That function requires the module ``idascript``
+        .. warning:: That function requires the module ``idascript``, or idalib if
+                     a pool of IDA sessions is given
 
         :param exec_file: executable file path
         :param output_file: BinExport output file
         :param open_export: whether or not to open the binexport after export
         :param override: Override the .BinExport if already existing. (default false)
         :param backend: The backend to use. (Either 'IDA' or 'Ghidra')
+        :param ida_pool: pool of long-lived IDA sessions used to export with IDA,
+                         instead of starting IDA for this program
         :return: an instance of ProgramBinExport if open_export is true, else boolean
                  on whether it succeeded
         """
@@ -151,7 +562,14 @@ class ProgramBinExport(dict):
             else:
                 return True
 
-        if backend == DisassemblerBackend.IDA:
+        if backend == DisassemblerBackend.IDA and ida_pool is not None:
+            try:
+                success = ida_pool.export(exec_file, binexport_file)
+            except TimeoutError as e:
+                logger.warning(str(e))
+                success = False
+            return ProgramBinExport(binexport_file) if success and open_export else success
+        elif backend == DisassemblerBackend.IDA:
             return ProgramBinExport._from_ida(exec_file, binexport_file, open_export)
         elif backend == DisassemblerBackend.GHIDRA:
             return ProgramBinExport._from_ghidra(exec_file, binexport_file, open_export)
@@ -159,6 +577,63 @@ class ProgramBinExport(dict):
             logger.error(f"Invalid backend '{backend}'")
             return False
 
+    @staticmethod
+    def from_binary_files(
+        exec_files: abc.Iterable[pathlib.Path | str],
+        output_files: abc.Iterable[pathlib.Path | str] | None = None,
+        override: bool = False,
+        backend: DisassemblerBackend = DisassemblerBackend.IDA,
+        batch_size: int = GHIDRA_BATCH_SIZE,
+        ida_pool: IDAWorkerPool | None = None,
+    ) -> dict[pathlib.Path, bool]:
+        """
+        Generate the .BinExport files of several programs. With Ghidra, the programs
+        are exported in batches sharing a single headless session (and thus a single
+        JVM and Ghidra startup), otherwise they are exported one by one (with the
+        sessions of the pool if given).
+
+        :param exec_files: executable file paths
+        :param output_files: BinExport output files, in the same order as the executables
+                             (default: next to the executables)
+        :param override: Override the .BinExport if already existing. (default false)
+        :param backend: The backend to use. (Either 'IDA' or 'Ghidra')
+        :param batch_size: maximum number of programs exported by a Ghidra session
+        :param ida_pool: pool of long-lived IDA sessions used to export with IDA
+        :return: dictionary executable file path -> whether the export succeeded
+        """
+        exec_files = [pathlib.Path(f) for f in exec_files]
+        if output_files is None:
+            output_files = [pathlib.Path(str(f) + ".BinExport") for f in exec_files]
+        else:
+            output_files = [pathlib.Path(f) for f in output_files]
+            if len(output_files) != len(exec_files):
+                raise ValueError("There must be as many output files as executable files")
+
+        results = {}
+        jobs = []
+        for exec_file, binexport_file in zip(exec_files, output_files):
+            # If the binexport file already exists, do not want to override
+            if binexport_file.exists() and not override:
+                results[exec_file] = True
+            else:
+                jobs.append((exec_file, binexport_file))
+
+        if backend == DisassemblerBackend.GHIDRA:
+            results.update(ProgramBinExport._from_ghidra_batch(jobs, batch_size))
+        else:
+            for exec_file, binexport_file in jobs:
+                results[exec_file] = bool(
+                    ProgramBinExport.from_binary_file(
+                        exec_file,
+                        binexport_file,
+                        open_export=False,
+                        override=True,
+                        backend=backend,
+                        ida_pool=ida_pool,
+                    )
+                )
+        return results
+
     @staticmethod
     def _from_ida(
         exec_file: pathlib.Path,
@@ -204,79 +679,126 @@ class ProgramBinExport(dict):
             return False
 
     @staticmethod
-    def _from_ghidra(
-        exec_file: pathlib.Path,
-        binexport_file: pathlib.Path,
-        open_export: bool = True,
-    ) -> ProgramBinExport | bool:
+    def _ghidra_dir() -> pathlib.Path | None:
         """
-        Generate the .BinExport file for the given program and return an instance
-        of ProgramBinExport.
-
-        .. warning:: That function requires Ghidra to be installed
+        Ghidra installation directory, given by the GHIDRA_PATH environment variable.
 
-        :param exec_file: executable file path
-        :param binexport_file: BinExport output file
-        :param open_export: whether or not to open the binexport after export
-        :return: an instance of ProgramBinExport if open_export is true, else boolean
-                 on whether it succeeded
+        :return: the directory, None if it is not defined or does not exist
         """
-
         # Check if the GHIDRA_PATH environment variable is set
         ghidra_dir = os.environ.get("GHIDRA_PATH")
         if not ghidra_dir:
             logger.error(
                 "The 'GHIDRA_PATH' environment variable is not set. Please define it to proceed."
             )
-            return False
+            return None
 
         # Check if the GHIDRA_PATH dir exists
         ghidra_dir = pathlib.Path(ghidra_dir)
         if not ghidra_dir.exists() or not ghidra_dir.is_dir():
             logger.error(f"The path specified in 'GHIDRA_PATH' does not exist: {ghidra_dir}")
-            return False
+            return None
+        return ghidra_dir
+
+    @staticmethod
+    def _ghidra_command(
+        ghidra_dir: pathlib.Path,
+        tmpdir: pathlib.Path,
+        jobs: abc.Sequence[tuple[pathlib.Path, pathlib.Path]],
+    ) -> list[str]:
+        """
+        Command line of the Ghidra headless analyzer exporting programs, using a
+        project and a post-script written in a temporary directory. With several
+        programs, the post-script exports each one (identified by its file name,
+        which must be unique) to its own BinExport file.
 
+        :param ghidra_dir: Ghidra installation directory
+        :param tmpdir: temporary directory
+        :param jobs: (executable file path, BinExport output file) pairs
+        :return: the command line
+        """
         # Small script to do the binexport
+        if len(jobs) == 1:
+            export = f"""
+            exporter = BinExportExporter() #Binary BinExport (v2) for BinDiff
+            exporter.export(File("{jobs[0][1].absolute()}"), currentProgram, currentProgram.getMemory(), monitor)
+            """
+        else:
+            outputs_path = tmpdir / "outputs.json"
+            with open(outputs_path, "w") as fp:
+                json.dump({exe.name: str(out.absolute()) for exe, out in jobs}, fp)
+            export = f"""
+            import json
+            with open({str(outputs_path)!r}) as fp:
+                outputs = json.load(fp)
+            name = currentProgram.getDomainFile().getName()
+            if name in outputs:
+                exporter = BinExportExporter() #Binary BinExport (v2) for BinDiff
+                exporter.export(File(outputs[name]), currentProgram, currentProgram.getMemory(), monitor)
+            """
         ghidra_script = dedent(
-            f"""
+            """
             from java.io import File
             try:
                 from com.google.security.binexport import BinExportExporter
             except ImportError:
                 print("BinExport plugin is not installed")
                 exit()
-            
-            exporter = BinExportExporter() #Binary BinExport (v2) for BinDiff
-            exporter.export(File("{binexport_file.absolute()}"), currentProgram, currentProgram.getMemory(), monitor)
             """
+            + export
         )
+        ghidra_script_path = tmpdir / "BinExportGhidraScript.py"
+        with open(ghidra_script_path, "w") as fp:
+            fp.write(ghidra_script)
+
+        return [
+            str(ghidra_dir / "support" / "analyzeHeadless"),
+            str(tmpdir),
+            "tmpproj",
+            "-scriptPath",
+            str(tmpdir),
+            "-postScript",
+            str(ghidra_script_path),
+            "-import",
+            *(str(exec_file.absolute()) for exec_file, _ in jobs),
+        ]
+
+    @staticmethod
+    def _from_ghidra(
+        exec_file: pathlib.Path,
+        binexport_file: pathlib.Path,
+        open_export: bool = True,
+    ) -> ProgramBinExport | bool:
+        """
+        Generate the .BinExport file for the given program and return an instance
+        of ProgramBinExport.
+
+        .. warning:: That function requires Ghidra to be installed
+
+        :param exec_file: executable file path
+        :param binexport_file: BinExport output file
+        :param open_export: whether or not to open the binexport after export
+        :return: an instance of ProgramBinExport if open_export is true, else boolean
+                 on whether it succeeded
+        """
+
+        ghidra_dir = ProgramBinExport._ghidra_dir()
+        if ghidra_dir is None:
+            return False
 
         # Do everything in a TemporaryDirectory to avoid polluting the user filesystem
         with TemporaryDirectory() as tmpdirname:
-            tmpdir = pathlib.Path(tmpdirname)
-            ghidra_script_path = tmpdir / "BinExportGhidraScript.py"
-            with open(ghidra_script_path, "w") as fp:
-                fp.write(ghidra_script)
-
             proc = run(
-                [
-                    str(ghidra_dir / "support" / "analyzeHeadless"),
-                    tmpdirname,
-                    "tmpproj",
-                    "-scriptPath",
-                    tmpdirname,
-                    "-postScript",
-                    str(ghidra_script_path),
-                    "-import",
-                    str(exec_file.absolute()),
-                ],
+                ProgramBinExport._ghidra_command(
+                    ghidra_dir, pathlib.Path(tmpdirname), [(exec_file, binexport_file)]
+                ),
                 stdout=PIPE,
                 stderr=DEVNULL,
             )
 
             if proc.returncode != 0:
                 logger.warning(
-                    f"{exec_file.name} failed to export [ret:{e.returncode}, binexport:{binexport_file.exists()}]"
+                    f"{exec_file.name} failed to export [ret:{proc.returncode}, binexport:{binexport_file.exists()}]"
                 )
                 return False
 
@@ -292,19 +814,405 @@ class ProgramBinExport(dict):
             logger.error(f"{exec_file} can't find binexport generated")
             return False
 
+    @staticmethod
+    def _from_ghidra_batch(
+        jobs: abc.Iterable[tuple[pathlib.Path, pathlib.Path]],
+        batch_size: int = GHIDRA_BATCH_SIZE,
+    ) -> dict[pathlib.Path, bool]:
+        """
+        Generate the .BinExport files of several programs with Ghidra, importing them
+        by batches in a single headless session whose post-script exports each program
+        to its own BinExport file.
+
+        .. warning:: That function requires Ghidra to be installed
+
+        :param jobs: (executable file path, BinExport output file) pairs
+        :param batch_size: maximum number of programs imported in a session
+        :return: dictionary executable file path -> whether the export succeeded
+        """
+        jobs = list(jobs)
+        results = {exec_file: False for exec_file, _ in jobs}
+        if not jobs:
+            return results
+
+        ghidra_dir = ProgramBinExport._ghidra_dir()
+        if ghidra_dir is None:
+            return results
+
+        # Programs are named after their file in the project, names must be unique in a session
+        sessions: list[dict[str, tuple[pathlib.Path, pathlib.Path]]] = []
+        for exec_file, binexport_file in jobs:
+            for session in sessions:
+                if len(session) < batch_size and exec_file.name not in session:
+                    break
+            else:
+                session = {}
+                sessions.append(session)
+            session[exec_file.name] = (exec_file, binexport_file)
+
+        for session in sessions:
+            # Stale BinExport files would be taken for successful exports
+            for _, binexport_file in session.values():
+                binexport_file.unlink(missing_ok=True)
+
+            with TemporaryDirectory() as tmpdirname:
+                proc = run(
+                    ProgramBinExport._ghidra_command(
+                        ghidra_dir, pathlib.Path(tmpdirname), list(session.values())
+                    ),
+                    stdout=PIPE,
+                    stderr=DEVNULL,
+                )
+
+            if b"BinExport plugin is not installed" in proc.stdout:
+                logger.warning("BinExport plugin not found, please install it!")
+                return results
+
+            # A program failing to import or export does not stop the others
+            for exec_file, binexport_file in session.values():
+                results[exec_file] = binexport_file.exists()
+                if not results[exec_file]:
+                    logger.warning(
+                        f"{exec_file.name} failed to export [ret:{proc.returncode}, binexport:False]"
+                    )
+        return results
+
     @property
     def proto(self) -> BinExport2:
         """
-        Returns the protobuf object associated to the program
+        Returns the protobuf object associated to the program.
+        The BinExport file is parsed on first access. If only some fields were
+        selected, the object returned is a proxy decoding the other fields on access.
         """
+        if self._pb is None:
+            if self._buffer is not None:
+                self._pb = BinExport2.FromString(self._buffer)
+                self._buffer = None
+            elif self._fields is None:
+                self._pb = BinExport2()
+                with open(self.path, "rb") as f:
+                    self._pb.ParseFromString(f.read())
+            else:
+                self._pb = LazyMessage(BinExport2, self.path, self._fields)
+        elif isinstance(self._pb, LazyMessage) and self._pb.loaded:
+            self._pb = self._pb.message
         return self._pb
 
+    def _raw_buffer(self) -> bytes | memoryview:
+        """
+        Serialized protobuf of the program: the buffer given to the constructor or
+        the BinExport file content.
+        """
+        if self._buffer is not None:
+            return self._buffer
+        try:
+            return self.path.read_bytes()
+        except OSError:
+            if isinstance(self.proto, LazyMessage):
+                raise
+            return self.proto.SerializeToString()
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickle the program as its protobuf buffer and index arrays, rebuilt lazily when
+        unpickled, or as a lightweight handle if the program is shared, see
+        :py:meth:`ProgramBinExport.share`. Unpickling the same program several times in
+        a process returns the same object.
+        """
+        return reduce_program(self)
+
+    def share(self) -> SharedProgram:
+        """
+        Copy the protobuf buffer and the index arrays of the program in shared memory
+        (once) so that the program is then pickled as a small handle, opened from the shared
+        memory by other processes. The shared memory is released by
+        :py:meth:`ProgramBinExport.unshare` or when the program is deleted.
+
+        .. code-block:: python
+
+            handle = program.share()
+            with ProcessPoolExecutor() as pool:
+                # Functions are pickled as (program handle, address)
+                names = pool.map(get_name, program.values())
+
+        :return: picklable handle on the shared program, see :py:meth:`SharedProgram.open`
+        """
+        if self._shared is None:
+            self._shared, shm = share_program(self)
+            self._shm = weakref.finalize(self, release_shared_memory, shm)
+            self._token = self._shared.name
+            register_program(self)
+        return self._shared
+
+    def unshare(self) -> None:
+        """
+        Release the shared memory of the program (if it has been created by this program).
+        Processes that already opened the program keep their copy.
+        """
+        if self._shm is not None:
+            self._shm()
+            self._shm = None
+            self._shared = None
+
+    @cached_property
+    def meta_information(self) -> BinExport2.Meta:
+        """
+        Returns the meta information of the program (taken from the cache if available,
+        to avoid parsing the protobuf)
+        """
+        if self._pb is None and self._sidecar is not None:
+            return self._sidecar.meta_information
+        return self.proto.meta_information
+
+    @derived_index
+    def instruction_addresses(self) -> array.array | memoryview:
+        """
+        Addresses of all the instructions of the program indexed by their index
+        in the protobuf. The table is computed once, on first access, in a single
+        pass over the instructions.
+        """
+        if self._sidecar is not None:
+            return self._sidecar["instruction_addresses"]
+        return compute_instruction_addresses(self.proto)
+
+    def expression(self, exp_idx: int) -> ExpressionBinExport:
+        """
+        Returns the expression node at the given index in the protobuf. Each
+        expression is decoded once and the node is shared by all the operands
+        using it. Its `is_addr` and `is_data` flags are thus not set, see
+        :py:meth:`ExpressionBinExport.bind`.
+
+        :param exp_idx: index of the expression
+        :return: the shared expression node
+        """
+        expr = self._expressions.get(exp_idx)
+        if expr is None:
+            pb_expr = self.proto.expression[exp_idx]
+            parent = None
+            if pb_expr.HasField("parent_index"):
+                parent = self.expression(pb_expr.parent_index)
+            expr = ExpressionBinExport(self._context, exp_idx, parent)
+            self._expressions[exp_idx] = expr
+        return expr
+
+    @derived_index
+    def _mnemonics(self) -> list[str]:
+        """
+        Mnemonic names indexed by their index in the protobuf
+        """
+        return [mnemonic.name for mnemonic in self.proto.mnemonic]
+
+    def operand_string(self, op_idx: int) -> str:
+        """
+        Returns the string of an operand given its index in the protobuf.
+        Each operand is rendered only once, the string is then cached.
+
+        :param op_idx: index of the operand
+        :return: string of the operand
+        """
+        op_str = self._operand_strings.get(op_idx)
+        if op_str is None:
+            op_str = render_expressions(
+                [self.expression(idx) for idx in self.proto.operand[op_idx].expression_index]
+            )
+            self._operand_strings[op_idx] = op_str
+        return op_str
+
+    def instruction_string(self, inst_idx: int) -> str:
+        """
+        Returns the string of an instruction (mnemonic and operands) given its
+        index in the protobuf, without instantiating any object.
+
+        :param inst_idx: index of the instruction
+        :return: string of the instruction
+        """
+        return next(self.instruction_strings((inst_idx,)))
+
+    def instruction_strings(self, indices: abc.Iterable[int]) -> abc.Iterator[str]:
+        """
+        Bulk version of :py:meth:`ProgramBinExport.instruction_string`.
+
+        :param indices: indices of the instructions
+        :return: iterator over the strings of the instructions
+        """
+        instructions = self.proto.instruction
+        mnemonics = self._mnemonics
+        operand_strings = self._operand_strings
+        for inst_idx in indices:
+            pb_inst = instructions[inst_idx]
+            operands = [
+                operand_strings[idx] if idx in operand_strings else self.operand_string(idx)
+                for idx in pb_inst.operand_index
+            ]
+            yield f"{mnemonics[pb_inst.mnemonic_index]} {', '.join(operands)}"
+
+    def render_listing(self) -> abc.Iterator[tuple[Addr, str]]:
+        """
+        Render the listing of all the functions of the program, see
+        :py:meth:`FunctionBinExport.render_listing`.
+
+        :return: iterator of (function address, listing)
+        """
+        for addr in self:
+            yield addr, self[addr].render_listing()
+
+    def _function_blocks(self) -> abc.Iterator[tuple[Addr, int]]:
+        """
+        Iterates over the basic blocks of all the functions (without instantiating them).
+
+        :return: iterator of (function address, basic block index)
+        """
+        flow_graphs = self.proto.flow_graph
+        for addr, fg_idx in self._function_index.items():
+            if fg_idx is not None:
+                for bb_idx in flow_graphs[fg_idx].basic_block_index:
+                    yield addr, bb_idx
+
+    def iter_instructions(
+        self,
+    ) -> abc.Iterator[tuple[Addr, str, bytes, abc.Sequence[int], Addr]]:
+        """
+        Iterates over the instructions of all the functions, walking the functions,
+        their basic blocks and the instruction ranges once, without instantiating any
+        function, basic block or instruction object. An instruction belonging to several
+        functions is yielded once per function.
+
+        :return: iterator of (address, mnemonic, raw bytes, operand indices, function address)
+        """
+        pb = self.proto
+        basic_blocks = pb.basic_block
+        instructions = pb.instruction
+        addresses = self.instruction_addresses
+        mnemonics = self._mnemonics
+        for fun_addr, bb_idx in self._function_blocks():
+            for rng in basic_blocks[bb_idx].instruction_index:
+                for idx in instruction_index_range(rng):
+                    inst = instructions[idx]
+                    yield (
+                        addresses[idx],
+                        mnemonics[inst.mnemonic_index],
+                        inst.raw_bytes,
+                        inst.operand_index,
+                        fun_addr,
+                    )
+
+    def instruction_table(self) -> InstructionTable:
+        """
+        Struct-of-arrays variant of :py:meth:`ProgramBinExport.iter_instructions`:
+        each attribute of the table is a column holding one value per instruction.
+
+        :return: the instruction table
+        """
+        basic_blocks = self.proto.basic_block
+        index = array.array("I")
+        functions = array.array("Q")
+        blocks = array.array("I")
+        for fun_addr, bb_idx in self._function_blocks():
+            count = len(index)
+            for rng in basic_blocks[bb_idx].instruction_index:
+                index.extend(instruction_index_range(rng))
+            count = len(index) - count
+            functions.extend([fun_addr] * count)
+            blocks.extend([bb_idx] * count)
+
+        mnemonic_index, operand_ptr, operand_index = self._instruction_columns
+        addresses = self.instruction_addresses
+        row_operand_ptr = array.array("I", [0])
+        row_operand_index = array.array("I")
+        for idx in index:
+            row_operand_index.extend(operand_index[operand_ptr[idx] : operand_ptr[idx + 1]])
+            row_operand_ptr.append(len(row_operand_index))
+
+        code, code_offsets = self._code
+        return InstructionTable(
+            index=index,
+            address=array.array("Q", map(addresses.__getitem__, index)),
+            mnemonic=array.array("I", map(mnemonic_index.__getitem__, index)),
+            function=functions,
+            basic_block=blocks,
+            operand_ptr=row_operand_ptr,
+            operand_index=row_operand_index,
+            mnemonics=self._mnemonics,
+            code=code,
+            code_offsets=code_offsets,
+        )
+
+    def feature_matrix(self, mnemonics: abc.Iterable[str] | None = None) -> FeatureMatrix:
+        """
+        Compute the feature matrix of the functions of the program (one row per function),
+        see :py:func:`binexport.features.compute_feature_matrix`.
+
+        :param mnemonics: mnemonics vocabulary (by default the sorted mnemonics of the program)
+        :return: the feature matrix
+        """
+        return compute_feature_matrix(self, mnemonics)
+
+    @derived_index
+    def _instruction_columns(self) -> tuple[array.array, array.array, array.array]:
+        """
+        Mnemonic index of each instruction (by instruction index) and the operand indices
+        of the instructions in CSR layout (offsets by instruction index, operand indices).
+        """
+        mnemonic_index = array.array("I")
+        operand_ptr = array.array("I", [0])
+        operand_index = array.array("I")
+        for inst in self.proto.instruction:
+            mnemonic_index.append(inst.mnemonic_index)
+            operand_index.extend(inst.operand_index)
+            operand_ptr.append(len(operand_index))
+        return mnemonic_index, operand_ptr, operand_index
+
+    @derived_index
+    def _code(self) -> tuple[bytes, array.array]:
+        """
+        Raw bytes of all the instructions concatenated (in the protobuf order) and
+        offsets of each instruction in this buffer (with an extra ending offset)
+        """
+        raw_bytes = [inst.raw_bytes for inst in self.proto.instruction]
+        return b"".join(raw_bytes), array.array("Q", accumulate(map(len, raw_bytes), initial=0))
+
+    def instruction_bytes_view(self, begin: int, end: int) -> memoryview:
+        """
+        Returns a read-only view on the bytes of a range of contiguous instructions,
+        taken on a code buffer shared by the whole program (computed on first call).
+
+        :param begin: index of the first instruction
+        :param end: index following the last instruction
+        :return: view on the instructions bytes
+        """
+        code, offsets = self._code
+        return memoryview(code)[offsets[begin] : offsets[end]]
+
+    def instruction_address(self, inst_idx: int) -> Addr:
+        """
+        Returns the address of an instruction given its index in the protobuf.
+
+        :param inst_idx: index of the instruction
+        :return: address of the instruction
+        """
+        return self.instruction_addresses[inst_idx]
+
+    def basic_block_address(self, bb_idx: int) -> Addr:
+        """
+        Returns the address of a basic block given its index in the protobuf.
+        It is the address of the first instruction of the basic block.
+
+        :param bb_idx: index of the basic block
+        :return: address of the basic block
+        """
+        if self._sidecar is not None:
+            rng_idx = self._sidecar["block_ranges_ptr"][bb_idx]
+            return self.instruction_addresses[self._sidecar["block_ranges_begin"][rng_idx]]
+        return self.instruction_addresses[
+            self.proto.basic_block[bb_idx].instruction_index[0].begin_index
+        ]
+
     @property
     def name(self) -> str:
         """
         Return the name of the program (as exported by binexport)
         """
-        return self.proto.meta_information.executable_name
+        return self.meta_information.executable_name
 
     @property
     def architecture(self) -> str:
@@ -312,4 +1220,4 @@ class ProgramBinExport(dict):
         Returns the architecture suffixed with address size ex: x86_64, x86_32
         """
 
-        return self.proto.meta_information.architecture_name
+        return self.meta_information.architecture_name
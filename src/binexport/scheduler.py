@@ -0,0 +1,306 @@
+from __future__ import annotations
+import os
+import time
+import heapq
+import queue
+import signal
+import itertools
+import threading
+import traceback
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, NamedTuple
+
+from binexport.utils import logger, mp_context
+
+if TYPE_CHECKING:
+    from collections import abc
+    from multiprocessing.process import BaseProcess
+    from binexport.ida_pool import IDAWorkerPool
+    from binexport.types import DisassemblerBackend
+
+
+POLL_INTERVAL = 0.1  #: Interval (in seconds) at which the running exports are checked
+MEMORY_BASE = 256 << 20  #: Estimated memory used by a backend, whatever the binary
+MEMORY_FACTOR = 32  #: Estimated memory used by a backend per byte of binary
+
+
+def estimate_memory(size: int) -> int:
+    """
+    Rough estimation of the memory used by a backend to export a binary.
+
+    :param size: size of the binary (in bytes)
+    :return: estimated memory (in bytes)
+    """
+    return MEMORY_BASE + MEMORY_FACTOR * size
+
+
+def physical_memory() -> int | None:
+    """
+    Size of the physical memory of the machine.
+
+    :return: memory size (in bytes), None if it cannot be determined
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class ExportJob(NamedTuple):
+    """
+    Export of a binary handled by :py:class:`ExportScheduler`.
+    """
+
+    path: Path  #: binary path
+    output: Path  #: BinExport file path
+    size: int  #: size of the binary (in bytes)
+
+    @property
+    def memory(self) -> int:
+        """
+        Estimated memory needed by the export (see :py:func:`estimate_memory`).
+        """
+        return estimate_memory(self.size)
+
+
+class ExportResult(NamedTuple):
+    """
+    Result of an export job.
+    """
+
+    job: ExportJob  #: the job
+    success: bool  #: whether the BinExport file was generated
+    duration: float  #: wall-clock duration of the export (in seconds)
+    timed_out: bool = False  #: whether the export was killed on timeout
+
+
+def _export_process(path: Path, output: Path, backend: DisassemblerBackend) -> None:
+    """
+    Entry point of the process exporting a binary, the exit code tells whether it
+    succeeded. On POSIX systems the process leads its own process group so that
+    the backend it launches can be killed along with it.
+    """
+    from binexport import ProgramBinExport
+
+    if hasattr(os, "setsid"):
+        os.setsid()
+    try:
+        res = ProgramBinExport.from_binary_file(
+            path, output, open_export=False, override=True, backend=backend
+        )
+    except Exception:
+        logger.error(traceback.format_exc())
+        res = False
+    os._exit(0 if res else 1)
+
+
+class ExportScheduler:
+    """
+    Scheduler running the exports of binaries, each in its own process (and thus its own
+    backend instance). Jobs are started largest binary first, so that a big binary does not
+    stall the end of a batch, as long as a worker is free and their estimated memory fits
+    the memory budget (a job is always started when no other one is running). An export
+    lasting longer than the timeout is killed along with its backend processes.
+    With a pool of IDA sessions, the exports are sent to the sessions by threads instead.
+
+    Jobs can be submitted while others are running, the results are retrieved with
+    :py:meth:`ExportScheduler.results`. Once :py:meth:`ExportScheduler.close` is called,
+    the scheduler stops after the remaining jobs are done.
+    """
+
+    def __init__(
+        self,
+        backend: DisassemblerBackend,
+        workers: int = 1,
+        timeout: float | None = None,
+        memory_budget: int | None = None,
+        ida_pool: IDAWorkerPool | None = None,
+    ):
+        """
+        :param backend: backend used for the exports
+        :param workers: maximum number of exports running at the same time
+        :param timeout: wall-clock timeout of an export (in seconds), None for no timeout
+        :param memory_budget: memory available for the exports (in bytes), None for no limit
+        :param ida_pool: pool of long-lived IDA sessions doing the exports
+        """
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_budget = memory_budget
+        self.ida_pool = ida_pool
+
+        self._pending: list[tuple[int, int, ExportJob]] = []  # heap, largest binary first
+        self._counter = itertools.count()  # keep the submission order among equal sizes
+        self._running: dict[ExportJob, tuple[BaseProcess | Future, float]] = {}
+        self._executor = ThreadPoolExecutor(self.workers) if ida_pool is not None else None
+        self._memory = 0  # estimated memory of the running jobs
+        self._closed = False
+        self._cond = threading.Condition()
+        self._results: queue.Queue[ExportResult | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ExportScheduler", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> ExportScheduler:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+        self._thread.join()
+
+    def submit(self, path: Path | str, output: Path | str) -> ExportJob:
+        """
+        Schedule the export of a binary.
+
+        :param path: binary path
+        :param output: BinExport file path
+        :return: the job scheduled
+        """
+        path = Path(path)
+        job = ExportJob(path, Path(output), path.stat().st_size)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Cannot submit a job to a closed scheduler")
+            heapq.heappush(self._pending, (-job.size, next(self._counter), job))
+            self._cond.notify()
+        return job
+
+    def close(self) -> None:
+        """
+        Do not accept new jobs, the scheduler stops once the pending ones are done.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def terminate(self) -> None:
+        """
+        Drop the pending jobs and kill the running ones.
+        """
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            for task, _ in self._running.values():
+                if not isinstance(task, Future):
+                    self._kill(task)
+            if self.ida_pool is not None:
+                self.ida_pool.terminate()
+            self._cond.notify()
+
+    def results(self, block: bool = True) -> abc.Iterator[ExportResult]:
+        """
+        Iterates over the results of the exports, as they finish.
+
+        :param block: wait for all the jobs to be done (the scheduler must be closed),
+                      otherwise only yield the results already available
+        :return: iterator of the results
+        """
+        while True:
+            try:
+                result = self._results.get(block=block)
+            except queue.Empty:
+                return
+            if result is None:  # The scheduler stopped
+                self._results.put(None)
+                return
+            yield result
+
+    @staticmethod
+    def _kill(process: BaseProcess) -> None:
+        """
+        Kill an export process and the backend processes it launched.
+        """
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            # The process group may not exist yet (or anymore)
+            process.kill()
+
+    def _pool_export(self, job: ExportJob) -> tuple[bool, bool]:
+        """
+        Export a binary with the pool of IDA sessions.
+
+        :return: whether the export succeeded and whether it timed out
+        """
+        try:
+            return self.ida_pool.export(job.path, job.output, self.timeout), False
+        except TimeoutError:
+            logger.warning(f"Export of {job.path} timed out after {self.timeout}s, killed")
+            return False, True
+        except Exception:
+            logger.error(traceback.format_exc())
+            return False, False
+
+    def _start_jobs(self) -> None:
+        """
+        Start the largest pending jobs that are admitted by the workers and memory limits.
+        """
+        while self._pending and len(self._running) < self.workers:
+            job = self._pending[0][2]
+            if (
+                self._running
+                and self.memory_budget is not None
+                and self._memory + job.memory > self.memory_budget
+            ):
+                break  # Wait for memory to be released, not to delay the largest job
+            heapq.heappop(self._pending)
+            if self._executor is not None:
+                task = self._executor.submit(self._pool_export, job)
+            else:
+                task = mp_context.Process(
+                    target=_export_process,
+                    args=(job.path, job.output, self.backend),
+                    name=f"export-{job.path.name}",
+                )
+                task.start()
+            self._running[job] = (task, time.monotonic())
+            self._memory += job.memory
+            logger.debug(f"Start exporting {job.path} ({job.size} bytes)")
+
+    def _check_jobs(self) -> None:
+        """
+        Collect the finished jobs and kill the ones exceeding the timeout.
+        """
+        now = time.monotonic()
+        for job, (task, start) in list(self._running.items()):
+            if isinstance(task, Future):
+                # The pool enforces the timeout
+                if not task.done():
+                    continue
+                success, timed_out = task.result()
+            else:
+                timed_out = False
+                if task.exitcode is None:
+                    if self.timeout is None or now - start < self.timeout:
+                        continue
+                    logger.warning(f"Export of {job.path} timed out after {self.timeout}s, killed")
+                    self._kill(task)
+                    timed_out = True
+                task.join()
+                success = not timed_out and task.exitcode == 0
+                task.close()
+            del self._running[job]
+            self._memory -= job.memory
+            self._results.put(ExportResult(job, success, now - start, timed_out))
+
+    def _run(self) -> None:
+        """
+        Scheduling loop, stops once the scheduler is closed and all the jobs are done.
+        """
+        while True:
+            with self._cond:
+                self._start_jobs()
+                if self._closed and not self._pending and not self._running:
+                    break
+                self._cond.wait(POLL_INTERVAL)
+            with self._cond:
+                self._check_jobs()
+        if self._executor is not None:
+            self._executor.shutdown()
+        self._results.put(None)
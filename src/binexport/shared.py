@@ -0,0 +1,220 @@
+from __future__ import annotations
+import sys
+import array
+import uuid
+import weakref
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, NamedTuple
+
+from binexport.sidecar import _align
+
+if TYPE_CHECKING:
+    from binexport.program import ProgramBinExport
+    from binexport.function import FunctionBinExport
+    from binexport.basic_block import BasicBlockBinExport
+    from binexport.types import Addr
+
+
+# Programs of the current process by token, so that unpickling many objects
+# of the same program (or the same program many times) does not rebuild it
+_programs: weakref.WeakValueDictionary[str, ProgramBinExport] = weakref.WeakValueDictionary()
+
+
+class SharedProgram(NamedTuple):
+    """
+    Picklable handle on a program whose protobuf buffer and index arrays have been
+    copied in shared memory by :py:meth:`ProgramBinExport.share`. Its layout is the
+    protobuf buffer followed by the instruction addresses, the functions addresses and
+    their FlowGraph indices (-1 for imported functions), each array aligned on 8 bytes.
+    """
+
+    name: str  #: name of the shared memory block (also used as program token)
+    path: str  #: BinExport file path
+    size: int  #: size of the protobuf buffer
+    instructions: int  #: number of instruction addresses
+    functions: int  #: number of functions
+
+    def open(self) -> ProgramBinExport:
+        """
+        Open the program from the shared memory (or return it if already opened
+        in this process).
+
+        :return: the program
+        """
+        program = _programs.get(self.name)
+        if program is None:
+            shm = _attach(self.name)
+            views = [shm.buf[part] for part in self._layout()]
+            try:
+                program = _rebuild(self.name, self.path, *views)
+                program._shared = self
+            finally:
+                for view in views:
+                    view.release()
+                shm.close()
+        return program
+
+    def _layout(self) -> tuple[slice, slice, slice, slice]:
+        """
+        Slices of the protobuf buffer, instruction addresses, function addresses and
+        FlowGraph indices in the shared memory block.
+        """
+        addresses = _align(self.size)
+        functions = addresses + 8 * self.instructions
+        flow_graphs = functions + 8 * self.functions
+        return (
+            slice(0, self.size),
+            slice(addresses, functions),
+            slice(functions, flow_graphs),
+            slice(flow_graphs, flow_graphs + 8 * self.functions),
+        )
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Attach a shared memory block created by another process, without letting the
+    resource tracker destroy it when this process exits.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+
+    # Attaching registers the block to the resource tracker (bpo-39959)
+    shm = SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _program_arrays(program: ProgramBinExport) -> tuple[array.array, array.array, array.array]:
+    """
+    Index arrays transferred along the protobuf buffer: instruction addresses,
+    functions addresses and their FlowGraph indices (-1 for imported functions).
+    """
+    index = program._function_index
+    return (
+        array.array("Q", program.instruction_addresses),
+        array.array("Q", index.keys()),
+        array.array("q", (-1 if fg_idx is None else fg_idx for fg_idx in index.values())),
+    )
+
+
+def _from_bytes(typecode: str, buffer: bytes | memoryview) -> array.array:
+    """Copy a buffer in a new array of the given type"""
+    values = array.array(typecode)
+    values.frombytes(buffer)
+    return values
+
+
+def _rebuild(
+    token: str,
+    path: str,
+    raw: bytes | memoryview,
+    addresses: bytes | memoryview,
+    functions: bytes | memoryview,
+    flow_graphs: bytes | memoryview,
+) -> ProgramBinExport:
+    """
+    Rebuild a program (in lazy mode) from its protobuf buffer and index arrays and
+    register it under its token. The buffers are only used during the call.
+    """
+    from binexport.program import ProgramBinExport
+
+    program = ProgramBinExport(path, lazy=True, buffer=raw)
+    program.__dict__["instruction_addresses"] = _from_bytes("Q", addresses)
+    program.__dict__["_function_index"] = {
+        addr: None if fg_idx < 0 else fg_idx
+        for addr, fg_idx in zip(_from_bytes("Q", functions), _from_bytes("q", flow_graphs))
+    }
+    _ = program.proto  # Parse before the buffer is released
+    program._buffer = None
+    program._token = token
+    register_program(program)
+    return program
+
+
+def share_program(program: ProgramBinExport) -> tuple[SharedProgram, SharedMemory]:
+    """
+    Copy the protobuf buffer and the index arrays of a program in a new shared memory block.
+
+    :param program: program to share
+    :return: the handle on the shared program and the shared memory block (owned by the caller)
+    """
+    raw = program._raw_buffer()
+    addresses, functions, flow_graphs = _program_arrays(program)
+    handle = SharedProgram("", str(program.path), len(raw), len(addresses), len(functions))
+    layout = handle._layout()
+
+    shm = SharedMemory(create=True, size=max(layout[-1].stop, 1))
+    for part, data in zip(layout, (raw, addresses, functions, flow_graphs)):
+        shm.buf[part] = memoryview(data).cast("B")
+    return handle._replace(name=shm.name), shm
+
+
+def release_shared_memory(shm: SharedMemory) -> None:
+    """
+    Close and destroy a shared memory block.
+    """
+    shm.close()
+    if sys.version_info < (3, 13):
+        # Processes sharing the resource tracker of this one (e.g. spawned workers) have
+        # unregistered the block when attaching it, register it again for unlink()
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+
+def register_program(program: ProgramBinExport) -> None:
+    """
+    Register a program of the current process under its token.
+    """
+    _programs[program._token] = program
+
+
+def reduce_program(program: ProgramBinExport) -> tuple:
+    """
+    Pickling protocol of :py:class:`ProgramBinExport`: a shared program is pickled as its
+    :py:class:`SharedProgram` handle, otherwise the protobuf buffer and the index arrays
+    are embedded in the pickle.
+    """
+    if program._shared is not None:
+        return _unpickle_shared, (program._shared,)
+
+    if program._token is None:
+        program._token = uuid.uuid4().hex
+        register_program(program)
+    raw = program._raw_buffer()
+    addresses, functions, flow_graphs = _program_arrays(program)
+    return _unpickle_program, (
+        program._token,
+        str(program.path),
+        raw,
+        addresses.tobytes(),
+        functions.tobytes(),
+        flow_graphs.tobytes(),
+    )
+
+
+def _unpickle_shared(handle: SharedProgram) -> ProgramBinExport:
+    return handle.open()
+
+
+def _unpickle_program(
+    token: str, path: str, raw: bytes, addresses: bytes, functions: bytes, flow_graphs: bytes
+) -> ProgramBinExport:
+    program = _programs.get(token)
+    if program is None:
+        program = _rebuild(token, path, raw, addresses, functions, flow_graphs)
+    return program
+
+
+def _unpickle_function(program: ProgramBinExport, addr: Addr) -> FunctionBinExport:
+    function = program[addr]
+    # Objects only hold weak references to their program, which might not be referenced
+    # anywhere else in the process unpickling the function
+    function._program_ref = program
+    return function
+
+
+def _unpickle_basic_block(function: FunctionBinExport, addr: Addr) -> BasicBlockBinExport:
+    basic_block = function[addr]
+    basic_block._function_ref = function  # Same as in _unpickle_function
+    return basic_block
@@ -0,0 +1,247 @@
+from __future__ import annotations
+import os
+import sys
+import json
+import mmap
+import array
+import pathlib
+from typing import TYPE_CHECKING
+
+from binexport.binexport2_pb2 import BinExport2
+from binexport.utils import logger
+from binexport.wire import read_meta_information
+
+if TYPE_CHECKING:
+    from binexport.program import ProgramBinExport
+
+
+def _align(offset: int) -> int:
+    """Round up an offset to the next multiple of 8"""
+    return -(-offset // 8) * 8
+
+
+class SidecarCache:
+    """
+    On-disk cache of the tables derived from a BinExport file. The cache is stored
+    next to the BinExport file and holds flat arrays (instruction addresses,
+    basic block ranges, functions, call graph edges and references) that are
+    memory-mapped when reopened, so that no protobuf parsing is required.
+
+    The cache is keyed by the BinExport path, size, modification time and
+    executable id. Any mismatch invalidates it.
+    """
+
+    MAGIC = b"PYBXIDX\x00"
+    VERSION = 1
+    SUFFIX = ".cache"
+
+    def __init__(self, path: pathlib.Path, buf: mmap.mmap, header: dict):
+        """
+        :param path: cache file path
+        :param buf: memory-mapped cache file
+        :param header: decoded cache header
+        """
+        self.path: pathlib.Path = path  #: cache file path
+        self._buf = buf
+        self._header = header
+        self._arrays = {}
+
+    def __getitem__(self, name: str) -> memoryview:
+        """
+        Get a memory-mapped table of the cache.
+
+        :param name: name of the table
+        :return: a memoryview over the table items
+        """
+        if name not in self._arrays:
+            typecode, offset, count = self._header["arrays"][name]
+            offset += self._header["data_offset"]
+            size = array.array(typecode).itemsize * count
+            self._arrays[name] = memoryview(self._buf)[offset : offset + size].cast(typecode)
+        return self._arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._header["arrays"]
+
+    @property
+    def meta_information(self) -> BinExport2.Meta:
+        """
+        Meta information of the program stored in the cache
+        """
+        return BinExport2.Meta.FromString(bytes.fromhex(self._header["meta"]))
+
+    @property
+    def vertex_names(self) -> list[str]:
+        """
+        Names of the call graph vertices (empty string if unnamed)
+        """
+        return bytes(self["vertex_names"]).decode().split("\0")
+
+    @staticmethod
+    def cache_path(file: pathlib.Path | str) -> pathlib.Path:
+        """
+        Path of the cache associated to a BinExport file.
+
+        :param file: BinExport file path
+        :return: cache file path
+        """
+        file = pathlib.Path(file)
+        return file.with_name(file.name + SidecarCache.SUFFIX)
+
+    @staticmethod
+    def _key(file: pathlib.Path | str, executable_id: str) -> dict:
+        file = pathlib.Path(file)
+        st = file.stat()
+        return {
+            "path": str(file.absolute()),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "executable_id": executable_id,
+        }
+
+    @classmethod
+    def open(cls, file: pathlib.Path | str) -> SidecarCache | None:
+        """
+        Open the cache associated to a BinExport file if it exists and is valid.
+
+        :param file: BinExport file path
+        :return: the cache object, None if there is no valid cache
+        """
+        cache_file = cls.cache_path(file)
+        if not cache_file.exists():
+            return None
+
+        with open(cache_file, "rb") as f:
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                return None
+
+        try:
+            if buf[: len(cls.MAGIC)] != cls.MAGIC:
+                raise ValueError("invalid magic")
+            start = len(cls.MAGIC) + 8
+            header_size = int.from_bytes(buf[len(cls.MAGIC) : start], "little")
+            header = json.loads(buf[start : start + header_size])
+            header["data_offset"] = _align(start + header_size)
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupted cache {cache_file}: {e}")
+            buf.close()
+            return None
+
+        if header.get("version") != cls.VERSION or header.get("byteorder") != sys.byteorder:
+            buf.close()
+            return None
+        key = header["key"]
+        if key != cls._key(file, key["executable_id"]):
+            buf.close()
+            return None
+        if key["executable_id"] != read_meta_information(file).executable_id:
+            buf.close()
+            return None
+
+        return cls(cache_file, buf, header)
+
+    @classmethod
+    def create(cls, program: ProgramBinExport) -> SidecarCache | None:
+        """
+        Compute all the tables of the program and write them in the cache file
+        associated to its BinExport file.
+
+        :param program: program to cache
+        :return: the newly written cache object, None if it cannot be written
+        """
+        pb = program.proto
+        arrays = {"instruction_addresses": array.array("Q", program.instruction_addresses)}
+
+        # Basic blocks instruction ranges (CSR layout)
+        ranges_ptr, ranges_begin, ranges_end = array.array("I", [0]), [], []
+        for bb in pb.basic_block:
+            for rng in bb.instruction_index:
+                ranges_begin.append(rng.begin_index)
+                ranges_end.append(rng.end_index if rng.end_index else rng.begin_index + 1)
+            ranges_ptr.append(len(ranges_begin))
+        arrays["block_ranges_ptr"] = ranges_ptr
+        arrays["block_ranges_begin"] = array.array("I", ranges_begin)
+        arrays["block_ranges_end"] = array.array("I", ranges_end)
+
+        # Functions entry points
+        functions = program._function_index
+        arrays["function_address"] = array.array(
+            "Q", (a for a, i in functions.items() if i is not None)
+        )
+        arrays["function_flow_graph"] = array.array(
+            "I", (i for i in functions.values() if i is not None)
+        )
+        arrays["import_address"] = array.array("Q", (a for a, i in functions.items() if i is None))
+
+        # Call graph vertices and edges
+        vertices = program._vertex_index
+        arrays["vertex_address"] = array.array("Q", vertices.keys())
+        arrays["vertex_type"] = array.array("B", (t for t, _ in vertices.values()))
+        arrays["vertex_names"] = array.array(
+            "B", "\0".join(n or "" for _, n in vertices.values()).encode()
+        )
+        cg = pb.call_graph
+        edges = [
+            (cg.vertex[e.source_vertex_index].address, cg.vertex[e.target_vertex_index].address)
+            for e in cg.edge
+        ]
+        edges = [(src, dst) for src, dst in edges if src in functions and dst in functions]
+        arrays["call_edge_source"] = array.array("Q", (src for src, _ in edges))
+        arrays["call_edge_target"] = array.array("Q", (dst for _, dst in edges))
+
+        # References
+        arrays["data_ref_instruction"] = array.array(
+            "I", (r.instruction_index for r in pb.data_reference)
+        )
+        arrays["data_ref_address"] = array.array("Q", (r.address for r in pb.data_reference))
+        arrays["string_ref_instruction"] = array.array(
+            "I", (r.instruction_index for r in pb.string_reference)
+        )
+        arrays["string_ref_string"] = array.array(
+            "I", (r.string_table_index for r in pb.string_reference)
+        )
+
+        header = {
+            "version": cls.VERSION,
+            "byteorder": sys.byteorder,
+            "key": cls._key(program.path, pb.meta_information.executable_id),
+            "meta": pb.meta_information.SerializeToString().hex(),
+            "arrays": {},
+        }
+
+        # Array offsets are relative to the data section, 8 bytes aligned after the header
+        offset = 0
+        for name, arr in arrays.items():
+            header["arrays"][name] = [arr.typecode, offset, len(arr)]
+            offset += _align(arr.itemsize * len(arr))
+        raw_header = json.dumps(header).encode()
+
+        cache_file = cls.cache_path(program.path)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, "wb") as f:
+                f.write(cls.MAGIC)
+                f.write(len(raw_header).to_bytes(8, "little"))
+                f.write(raw_header)
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                for arr in arrays.values():
+                    arr.tofile(f)
+                    f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            logger.warning(f"Cannot write cache {cache_file}: {e}")
+            tmp_file.unlink(missing_ok=True)
+            return None
+
+        return cls.open(program.path)
+
+    def close(self) -> None:
+        """
+        Release the memory-mapped cache file
+        """
+        for view in self._arrays.values():
+            view.release()
+        self._arrays.clear()
+        self._buf.close()
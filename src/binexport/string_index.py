@@ -0,0 +1,166 @@
+from __future__ import annotations
+import re
+import bisect
+from typing import TYPE_CHECKING, NamedTuple
+
+from binexport.utils import instruction_index_range
+from binexport.xrefs import RefTable
+
+if TYPE_CHECKING:
+    from collections import abc
+    from binexport.program import ProgramBinExport
+    from binexport.types import Addr
+
+
+class StringMatch(NamedTuple):
+    """
+    String of the string table matched by a search, with its references.
+    """
+
+    index: int  #: index of the string in the string table
+    string: str  #: the string
+    instructions: tuple[int, ...]  #: indices of the instructions referencing the string
+    functions: tuple[Addr, ...]  #: addresses of the functions referencing the string
+
+
+class StringIndex:
+    """
+    Index of the string table of a program, built once: inverted map of the strings
+    to the instructions and functions referencing them, and substring / regex search.
+    Substrings are searched in a single buffer holding all the strings.
+    """
+
+    SEPARATOR = "\0"  #: Separator of the strings in the search buffer
+
+    def __init__(self, program: ProgramBinExport):
+        """
+        :param program: program to index
+        """
+        pb = program.proto
+        self.strings: list[str] = list(pb.string_table)  #: strings of the string table
+
+        # Search buffer and offset of each string in it
+        self._buffer = self.SEPARATOR.join(self.strings)
+        self._offsets = []
+        offset = 0
+        for string in self.strings:
+            self._offsets.append(offset)
+            offset += len(string) + len(self.SEPARATOR)
+
+        # {string index -> instruction indices}, from all the references of the protobuf
+        self._instructions = RefTable(
+            ((ref.string_table_index, ref.instruction_index) for ref in pb.string_reference),
+            value_typecode="I",
+        )
+
+        # {instruction index -> function addresses}, only for the referencing instructions
+        referencing = {ref.instruction_index for ref in pb.string_reference}
+        self._inst_functions: dict[int, list[Addr]] = {}
+        basic_blocks = pb.basic_block
+        for fun_addr, bb_idx in program._function_blocks():
+            for rng in basic_blocks[bb_idx].instruction_index:
+                for idx in referencing.intersection(instruction_index_range(rng)):
+                    functions = self._inst_functions.setdefault(idx, [])
+                    if fun_addr not in functions:
+                        functions.append(fun_addr)
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def instructions(self, string_idx: int) -> tuple[int, ...]:
+        """
+        Instructions referencing a string.
+
+        :param string_idx: index of the string in the string table
+        :return: instruction indices
+        """
+        return self._instructions[string_idx]
+
+    def functions(self, string_idx: int) -> tuple[Addr, ...]:
+        """
+        Functions referencing a string.
+
+        :param string_idx: index of the string in the string table
+        :return: function addresses
+        """
+        functions = {}
+        for inst_idx in self._instructions[string_idx]:
+            functions.update(dict.fromkeys(self._inst_functions.get(inst_idx, ())))
+        return tuple(functions)
+
+    def match(self, string_idx: int) -> StringMatch:
+        """
+        String and its references.
+
+        :param string_idx: index of the string in the string table
+        :return: the string with its references
+        """
+        return StringMatch(
+            string_idx,
+            self.strings[string_idx],
+            self.instructions(string_idx),
+            self.functions(string_idx),
+        )
+
+    def find(self, substring: str) -> list[int]:
+        """
+        Indices of the strings containing a substring.
+
+        :param substring: substring to search
+        :return: string indices (sorted)
+        """
+        if not substring or self.SEPARATOR in substring:
+            return [i for i, string in enumerate(self.strings) if substring in string]
+
+        indices = []
+        buffer, offsets = self._buffer, self._offsets
+        pos = buffer.find(substring)
+        while pos >= 0:
+            string_idx = bisect.bisect_right(offsets, pos) - 1
+            indices.append(string_idx)
+            # Resume the search at the next string
+            if string_idx + 1 >= len(offsets):
+                break
+            pos = buffer.find(substring, offsets[string_idx + 1])
+        return indices
+
+    def find_regex(self, pattern: str | re.Pattern, flags: int = 0) -> list[int]:
+        """
+        Indices of the strings matching a regular expression (with `re.search`).
+
+        :param pattern: regular expression
+        :param flags: flags of the regular expression (if not compiled)
+        :return: string indices (sorted)
+        """
+        search = re.compile(pattern, flags).search
+        return [i for i, string in enumerate(self.strings) if search(string)]
+
+    def search(
+        self, query: str | re.Pattern, regex: bool = False, referenced: bool = True
+    ) -> list[StringMatch]:
+        """
+        Search the strings containing a substring (or matching a regular expression)
+        and return them with their references.
+
+        :param query: substring or regular expression to search
+        :param regex: whether the query is a regular expression
+        :param referenced: only return strings referenced by at least one instruction
+        :return: list of matches
+        """
+        indices = self.find_regex(query) if regex else self.find(query)
+        if referenced:
+            indices = [i for i in indices if i in self._instructions]
+        return [self.match(i) for i in indices]
+
+    def search_many(
+        self, queries: abc.Iterable[str | re.Pattern], regex: bool = False, referenced: bool = True
+    ) -> dict[str | re.Pattern, list[StringMatch]]:
+        """
+        Bulk version of :py:meth:`StringIndex.search`.
+
+        :param queries: substrings or regular expressions to search
+        :param regex: whether the queries are regular expressions
+        :param referenced: only return strings referenced by at least one instruction
+        :return: dictionary query -> list of matches
+        """
+        return {query: self.search(query, regex, referenced) for query in queries}
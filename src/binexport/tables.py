@@ -0,0 +1,58 @@
+from __future__ import annotations
+import array
+from typing import NamedTuple
+
+
+class InstructionTable(NamedTuple):
+    """
+    Struct-of-arrays view of all the instructions of the functions of a program.
+    Each row is an instruction of a basic block of a function, following the
+    functions, basic blocks and instruction ranges order. An instruction shared by
+    several basic blocks or functions thus appears in several rows.
+    """
+
+    index: array.array  #: index of the instruction in the protobuf
+    address: array.array  #: address of the instruction
+    mnemonic: array.array  #: index of the mnemonic (in :py:attr:`InstructionTable.mnemonics`)
+    function: array.array  #: address of the function owning the instruction
+    basic_block: array.array  #: index of the basic block in the protobuf
+    operand_ptr: array.array  #: offsets of each row operands in `operand_index` (rows + 1)
+    operand_index: array.array  #: operand indices in the protobuf, see `operand_ptr`
+    mnemonics: list[str]  #: mnemonic names indexed by mnemonic index
+    code: bytes  #: raw bytes of all the instructions, in the protobuf order
+    code_offsets: array.array  #: offsets of the instructions in `code` by index (+ end offset)
+
+    @property
+    def rows(self) -> int:
+        """
+        Number of rows (instructions) of the table
+        """
+        return len(self.index)
+
+    def operands(self, row: int) -> array.array:
+        """
+        Operand indices of an instruction.
+
+        :param row: row of the instruction
+        :return: indices of the operands in the protobuf
+        """
+        return self.operand_index[self.operand_ptr[row] : self.operand_ptr[row + 1]]
+
+    def raw_bytes(self, row: int) -> bytes:
+        """
+        Raw bytes of an instruction.
+
+        :param row: row of the instruction
+        :return: bytes of the instruction
+        """
+        idx = self.index[row]
+        return self.code[self.code_offsets[idx] : self.code_offsets[idx + 1]]
+
+    def mnemonic_name(self, row: int) -> str:
+        """
+        Mnemonic of an instruction.
+
+        :param row: row of the instruction
+        :return: mnemonic name
+        """
+        return self.mnemonics[self.mnemonic[row]]
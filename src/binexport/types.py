@@ -64,3 +64,16 @@ class DisassemblerBackend(enum.Enum):
     IDA = enum.auto()        # doc: IDA backend
     GHIDRA = enum.auto()     # doc: Ghidra backend 
     # fmt: on
+
+
+@enum_tools.documentation.document_enum
+class XrefType(enum.Enum):
+    """
+    Types of the cross-references of an instruction.
+    """
+
+    # fmt: off
+    DATA = enum.auto()    # doc: data reference (to an address)
+    STRING = enum.auto()  # doc: string reference (to a string table index)
+    CODE = enum.auto()    # doc: code reference (call target address)
+    # fmt: on
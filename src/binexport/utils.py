@@ -1,17 +1,21 @@
 from __future__ import annotations
+import array
 import logging
+import multiprocessing
 from collections.abc import Iterator
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from binexport.binexport2_pb2 import Binexport2
+    from binexport.binexport2_pb2 import BinExport2
     from binexport.types import Addr
 
 
-def get_instruction_address(pb: "BinExport2", inst_idx: int) -> Addr:
+def get_instruction_address(pb: BinExport2, inst_idx: int) -> Addr:
     """
     Low level binexport protobuf function to return the address of an instruction
     given its index in the protobuf.
+    It might backtrack the instruction array, prefer using the precomputed table
+    :py:attr:`ProgramBinExport.instruction_addresses` for repeated lookups.
 
     :param pb: binexport protobuf object
     :param inst_idx: index of the instruction
@@ -25,6 +29,27 @@ def get_instruction_address(pb: "BinExport2", inst_idx: int) -> Addr:
         return backtrack_instruction_address(pb, inst_idx)
 
 
+def compute_instruction_addresses(pb: BinExport2) -> array.array:
+    """
+    Low level function computing the address of every instruction of the protobuf
+    in a single pass. Instructions that do not have the address field set directly
+    follow the previous one, thus their address is derived from the previous instruction
+    address and size.
+
+    :param pb: binexport protobuf object
+    :return: array of addresses indexed by instruction index
+    """
+
+    addresses = []
+    next_addr = 0
+    for inst in pb.instruction:
+        if inst.HasField("address"):
+            next_addr = inst.address
+        addresses.append(next_addr)
+        next_addr += len(inst.raw_bytes)
+    return array.array("Q", addresses)
+
+
 def backtrack_instruction_address(pb: BinExport2, idx: int) -> int:
     """
     Low level function to backtrack the instruction array for instruction that
@@ -62,7 +87,7 @@ def get_basic_block_addr(pb: BinExport2, bb_idx: int) -> Addr:
     return get_instruction_address(pb, inst)
 
 
-def instruction_index_range(rng: Binexport2.BasicBlock.IndexRange) -> Iterator[int]:
+def instruction_index_range(rng: BinExport2.BasicBlock.IndexRange) -> Iterator[int]:
     """
     Low level function to iterate over the indices of a protobuf IndexRange.
 
@@ -74,3 +99,10 @@ def instruction_index_range(rng: Binexport2.BasicBlock.IndexRange) -> Iterator[i
 
 # Main logger object
 logger = logging.getLogger("python-binexport")
+
+# Context of the worker processes: they are not forked, as they are started while other
+# threads (e.g. prefetching files, discovering binaries, logging) may hold locks, which a
+# forked child would inherit and never release
+mp_context = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
@@ -0,0 +1,301 @@
+from __future__ import annotations
+import mmap
+import pathlib
+from collections.abc import Iterable, Iterator
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.message import Message
+
+from binexport.binexport2_pb2 import BinExport2
+
+# Protobuf wire types
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+WIRE_FIXED32 = 5
+
+
+def decode_varint(buf: bytes | mmap.mmap, pos: int) -> tuple[int, int]:
+    """
+    Low level function decoding a protobuf varint.
+
+    :param buf: buffer containing the varint
+    :param pos: offset of the varint in the buffer
+    :return: the decoded value and the offset following the varint
+    """
+
+    result = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+
+
+def iter_fields(buf: bytes | mmap.mmap) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Iterates over the top-level fields of a serialized protobuf message
+    without decoding them.
+
+    :param buf: serialized message
+    :return: iterator of (field number, record offset, value offset, record end)
+    """
+
+    pos = 0
+    size = len(buf)
+    while pos < size:
+        start = pos
+        tag, pos = decode_varint(buf, pos)
+        field, wire_type = tag >> 3, tag & 0x7
+        if wire_type == WIRE_LENGTH_DELIMITED:
+            length, pos = decode_varint(buf, pos)
+            yield field, start, pos, pos + length
+            pos += length
+        elif wire_type == WIRE_VARINT:
+            value_start = pos
+            _, pos = decode_varint(buf, pos)
+            yield field, start, value_start, pos
+        elif wire_type == WIRE_FIXED64:
+            yield field, start, pos, pos + 8
+            pos += 8
+        elif wire_type == WIRE_FIXED32:
+            yield field, start, pos, pos + 4
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type} at offset {start}")
+
+
+# Skeleton message classes, per message type, see `_skeleton_class`
+_skeletons: dict[type[Message], type[Message] | None] = {}
+
+
+def _skeleton_class(message_type: type[Message]) -> type[Message] | None:
+    """
+    Build a message class with the same top-level fields as `message_type` but
+    all declared as repeated bytes. Parsing a message with it only copies the raw
+    records, without decoding them. It is only possible if all the top-level
+    fields are length-delimited.
+
+    :param message_type: protobuf message class
+    :return: the skeleton message class, None if it cannot be built
+    """
+
+    if message_type in _skeletons:
+        return _skeletons[message_type]
+
+    delimited = (
+        FieldDescriptor.TYPE_MESSAGE,
+        FieldDescriptor.TYPE_STRING,
+        FieldDescriptor.TYPE_BYTES,
+    )
+    desc = message_type.DESCRIPTOR
+    skeleton = None
+    if all(f.type in delimited for f in desc.fields):
+        file_proto = descriptor_pb2.FileDescriptorProto(
+            name=f"skeleton_{desc.full_name}.proto", syntax="proto2"
+        )
+        msg_proto = file_proto.message_type.add(name="Skeleton")
+        for field in desc.fields:
+            msg_proto.field.add(
+                name=field.name,
+                number=field.number,
+                type=FieldDescriptor.TYPE_BYTES,
+                label=FieldDescriptor.LABEL_REPEATED,
+            )
+        pool = descriptor_pool.DescriptorPool()
+        pool.Add(file_proto)
+        skeleton = message_factory.GetMessageClass(pool.FindMessageTypeByName("Skeleton"))
+    _skeletons[message_type] = skeleton
+    return skeleton
+
+
+def _scan_fields_skeleton(
+    message_type: type[Message], buf: bytes | mmap.mmap
+) -> dict[int, list[tuple[int, int]]] | None:
+    """
+    Compute the byte range of each top-level field using the protobuf parser
+    instead of iterating the records in Python. Records are copied (but not decoded)
+    into a skeleton message and the size of each field is obtained by clearing
+    them one by one. It assumes the fields are serialized contiguously, in field
+    number order (as protobuf serializers do), which is verified afterward.
+
+    :param message_type: protobuf message class
+    :param buf: serialized message
+    :return: dictionary field number -> list of (start, end) ranges of records,
+             None if the layout cannot be computed that way
+    """
+
+    skeleton_type = _skeleton_class(message_type)
+    if skeleton_type is None:
+        return None
+
+    with memoryview(buf) as view:
+        skeleton = skeleton_type.FromString(view)
+    counts = {f.number: len(getattr(skeleton, f.name)) for f in skeleton.DESCRIPTOR.fields}
+    names = {f.number: f.name for f in skeleton.DESCRIPTOR.fields}
+    numbers = sorted(number for number, count in counts.items() if count)
+    sizes = {}
+    # Assume the re-encoded message has the original size, it is verified below.
+    # Clearing the largest fields first keeps the successive ByteSize calls cheap.
+    size = len(buf)
+    for number in sorted(numbers, key=counts.get, reverse=True):
+        skeleton.ClearField(names[number])
+        new_size = skeleton.ByteSize()
+        sizes[number] = size - new_size
+        size = new_size
+    del skeleton
+    if size != 0:  # Unknown fields (e.g. extensions)
+        return None
+
+    ranges = {}
+    offset = 0
+    for number in numbers:
+        tag, _ = decode_varint(buf, offset)
+        if tag >> 3 != number:
+            return None
+        ranges[number] = [(offset, offset + sizes[number])]
+        offset += sizes[number]
+    if offset != len(buf):
+        return None
+    return ranges
+
+
+def scan_fields(
+    buf: bytes | mmap.mmap, message_type: type[Message] | None = None
+) -> dict[int, list[tuple[int, int]]]:
+    """
+    Scans the top-level records of a serialized protobuf message and returns
+    the byte ranges of each field. Consecutive records of the same field (e.g.
+    elements of a repeated field) are merged into a single range.
+
+    :param buf: serialized message
+    :param message_type: protobuf message class. If provided the scan is done
+                         by the protobuf parser whenever possible, which is much faster
+    :return: dictionary field number -> list of (start, end) ranges of records
+    """
+
+    if message_type is not None:
+        ranges = _scan_fields_skeleton(message_type, buf)
+        if ranges is not None:
+            return ranges
+
+    ranges = {}
+    last_field = None
+    for field, start, _, end in iter_fields(buf):
+        if field == last_field:
+            ranges[field][-1] = (ranges[field][-1][0], end)
+        else:
+            ranges.setdefault(field, []).append((start, end))
+            last_field = field
+    return ranges
+
+
+class LazyMessage:
+    """
+    Proxy over a protobuf message read from a file whose top-level fields are
+    only decoded when accessed. Selected fields can be decoded upfront, all the
+    others are skipped while scanning the wire format and decoded from the same
+    file the first time they are accessed.
+    """
+
+    def __init__(
+        self,
+        message_type: type[Message],
+        file: pathlib.Path | str,
+        fields: Iterable[str] = (),
+    ):
+        """
+        :param message_type: protobuf message class
+        :param file: file containing the serialized message
+        :param fields: names of the top-level fields to decode immediately
+        """
+        self._file = pathlib.Path(file)
+        self._message = message_type()
+        self._numbers = {f.name: f.number for f in message_type.DESCRIPTOR.fields}
+
+        with open(self._file, "rb") as f:
+            if self._file.stat().st_size == 0:
+                self._ranges = {}
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    self._ranges = scan_fields(buf, message_type)
+        # Fields not yet decoded, unknown fields (e.g. extensions) are decoded with the last one
+        self._pending = set(self._ranges)
+
+        self.load(*fields)
+
+    def __getattr__(self, name: str):
+        number = self._numbers.get(name)
+        if number is not None:
+            if number in self._pending:
+                self.load(name)
+        elif self._pending:  # Not a field (a method), decode everything
+            self.load()
+        return getattr(self._message, name)
+
+    def __str__(self) -> str:
+        return str(self.message)
+
+    @property
+    def message(self) -> Message:
+        """
+        The underlying protobuf message with all its fields decoded.
+        """
+        self.load()
+        return self._message
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether all the fields have been decoded.
+        """
+        return not self._pending
+
+    def load(self, *fields: str) -> None:
+        """
+        Decode the given top-level fields, all the pending ones if none is given.
+
+        :param fields: names of the fields to decode
+        """
+        if fields:
+            for name in fields:
+                if name not in self._numbers:
+                    raise ValueError(f"Unknown field {name}")
+            numbers = {self._numbers[name] for name in fields} & self._pending
+        else:
+            numbers = set(self._pending)
+        if not numbers:
+            return
+
+        with open(self._file, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                # Records are merged in file order to respect protobuf merge semantic
+                ranges = sorted(rng for number in numbers for rng in self._ranges[number])
+                self._message.MergeFromString(b"".join(buf[start:end] for start, end in ranges))
+        self._pending -= numbers
+
+
+def read_meta_information(file: pathlib.Path | str) -> BinExport2.Meta:
+    """
+    Read the meta information of a BinExport file without parsing the whole
+    protobuf. The meta information being the first field of the message, only
+    the beginning of the file is read.
+
+    :param file: BinExport file path
+    :return: the meta information message
+    """
+
+    meta = BinExport2.Meta()
+    with open(file, "rb") as f:
+        if pathlib.Path(file).stat().st_size == 0:
+            return meta
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            field_number = BinExport2.DESCRIPTOR.fields_by_name["meta_information"].number
+            for field, _, start, end in iter_fields(buf):
+                if field == field_number:
+                    meta.MergeFromString(buf[start:end])
+                    break
+    return meta
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import array
+import bisect
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections import abc
+    from binexport.types import XrefType
+
+
+class Xref(NamedTuple):
+    """
+    Cross-reference from an instruction, see :py:meth:`ProgramBinExport.xrefs_from`.
+    """
+
+    type: XrefType  #: type of the reference
+    instruction: int  #: index of the referencing instruction
+    target: int  #: address referred (string table index for string references)
+
+
+class RefTable(Mapping):
+    """
+    Read-only table of references {key -> values} stored in CSR layout: the sorted
+    unique keys, the offsets of their values and the values (sorted and deduplicated).
+    A key without any reference maps to an empty tuple, as it would for a
+    `defaultdict`, but without inserting anything. The inverted table is built on
+    first access.
+    """
+
+    def __init__(
+        self,
+        pairs: abc.Iterable[tuple[int, int]],
+        key_typecode: str = "I",
+        value_typecode: str = "Q",
+    ):
+        """
+        :param pairs: (key, value) pairs, duplicated ones are ignored
+        :param key_typecode: array type code of the keys
+        :param value_typecode: array type code of the values
+        """
+        self._keys = array.array(key_typecode)
+        self._ptr = array.array("Q", [0])
+        self._values = array.array(value_typecode)
+        self._inverted = None
+
+        last_key = None
+        for key, value in sorted(set(pairs)):
+            if key != last_key:
+                if last_key is not None:
+                    self._ptr.append(len(self._values))
+                self._keys.append(key)
+                last_key = key
+            self._values.append(value)
+        if last_key is not None:
+            self._ptr.append(len(self._values))
+
+    def _position(self, key: int) -> int:
+        """
+        Position of the key in the table (-1 if absent).
+        """
+        pos = bisect.bisect_left(self._keys, key)
+        if pos < len(self._keys) and self._keys[pos] == key:
+            return pos
+        return -1
+
+    def __getitem__(self, key: int) -> tuple[int, ...]:
+        pos = self._position(key)
+        if pos < 0:
+            return ()
+        return tuple(self._values[self._ptr[pos] : self._ptr[pos + 1]])
+
+    def get(self, key: int, default=None) -> tuple[int, ...] | None:
+        return self[key] if key in self else default
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, int) and self._position(key) >= 0
+
+    def __iter__(self) -> abc.Iterator[int]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __sizeof__(self) -> int:
+        return (
+            object.__sizeof__(self)
+            + self._keys.__sizeof__()
+            + self._ptr.__sizeof__()
+            + self._values.__sizeof__()
+        )
+
+    def pairs(self) -> abc.Iterator[tuple[int, int]]:
+        """
+        Iterates over all the (key, value) pairs of the table
+        """
+        keys, ptr, values = self._keys, self._ptr, self._values
+        for pos, key in enumerate(keys):
+            for i in range(ptr[pos], ptr[pos + 1]):
+                yield key, values[i]
+
+    def inverted(self) -> RefTable:
+        """
+        The inverted table {value -> keys}, built on first call.
+        """
+        if self._inverted is None:
+            self._inverted = RefTable(
+                ((value, key) for key, value in self.pairs()),
+                self._values.typecode,
+                self._keys.typecode,
+            )
+        return self._inverted